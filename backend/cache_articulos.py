@@ -0,0 +1,214 @@
+"""
+This module keeps a bounded LRU cache of articles by SKU, with a time to live.
+
+`crud.obtener_articulo` and `crud_async.obtener_articulo` read through it, so
+hot SKUs are served from memory. Missing SKUs are cached too (as None), so
+repeated lookups of SKUs that do not exist skip the database as well.
+
+Single-article writes are written through: `crud.registrar_escritura` caches
+the row returned by the INSERT/UPDATE (or None after a DELETE). Bulk writes
+only drop the SKUs they touched, so a large batch does not flush the hot
+entries out of the LRU. Every write is numbered with the id of its last entry
+in the 'cambios' table, so a late write never replaces the row of a newer one
+and `coherencia` can skip the changes whose row is already cached. A read
+that raced with a write of the same SKU does not cache what it read; reads of
+other SKUs are not affected. The TTL bounds how long writes made outside the
+API can go unnoticed.
+
+Configuration is read from the environment:
+    ABCC_ARTICULO_CACHE_MAX: Maximum number of cached SKUs, 0 disables the cache (default 10000).
+    ABCC_ARTICULO_CACHE_TTL: Lifetime of an entry in seconds (default 60).
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+TAMANO_MAXIMO = int(os.environ.get("ABCC_ARTICULO_CACHE_MAX", "10000"))
+TTL = float(os.environ.get("ABCC_ARTICULO_CACHE_TTL", "60"))
+
+# Returned by `consultar` when the SKU is not cached (None means "cached as missing").
+AUSENTE = object()
+
+class CacheArticulos:
+    """
+    LRU cache of article rows (dicts) by SKU, with per-entry expiration.
+    """
+
+    def __init__(self, tamano_maximo: int = TAMANO_MAXIMO, ttl: float = TTL):
+        self.tamano_maximo = tamano_maximo
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entradas = OrderedDict()
+        self._generacion = 0
+        # SKU -> (generation of its last write or invalidation, id of its last known change)
+        self._escrituras = OrderedDict()
+        # Generation of the newest write forgotten from _escrituras (or of the last full invalidation)
+        self._piso = 0
+        self.aciertos = 0
+        self.aciertos_negativos = 0
+        self.fallos = 0
+        self.expulsiones = 0
+
+    @property
+    def generacion(self) -> int:
+        """
+        Counter increased by every write and invalidation; read it before
+        reading an article from the database and pass it to `guardar`.
+        """
+        return self._generacion
+
+    def consultar(self, sku: str):
+        """
+        Looks up a SKU.
+
+        Args:
+            sku (str): The SKU to look up.
+
+        Returns:
+            The cached article (a dict), None if the SKU is cached as missing,
+            or AUSENTE if it is not cached or the entry expired.
+        """
+        with self._lock:
+            entrada = self._entradas.get(sku)
+            if entrada is None or entrada[0] < time.monotonic():
+                if entrada is not None:
+                    del self._entradas[sku]
+                self.fallos += 1
+                return AUSENTE
+            self._entradas.move_to_end(sku)
+            if entrada[1] is None:
+                self.aciertos_negativos += 1
+            else:
+                self.aciertos += 1
+            return entrada[1]
+
+    def _poner(self, sku: str, articulo):
+        """
+        Stores an entry and evicts the least recently used ones; the lock must be held.
+        """
+        self._entradas[sku] = (time.monotonic() + self.ttl, articulo)
+        self._entradas.move_to_end(sku)
+        while len(self._entradas) > self.tamano_maximo:
+            self._entradas.popitem(last=False)
+            self.expulsiones += 1
+
+    def _anotar(self, sku: str, cambio: int):
+        """
+        Records that a SKU was written at the current generation; the lock must be held.
+
+        Only the last `tamano_maximo` SKUs are remembered; forgetting one raises
+        the floor every read is checked against, which can only reject reads.
+        """
+        self._escrituras[sku] = (self._generacion, cambio)
+        self._escrituras.move_to_end(sku)
+        while len(self._escrituras) > self.tamano_maximo:
+            _, (generacion, _) = self._escrituras.popitem(last=False)
+            self._piso = max(self._piso, generacion)
+
+    def _ultimo_cambio(self, sku: str) -> int:
+        return self._escrituras.get(sku, (0, 0))[1]
+
+    def guardar(self, sku: str, articulo, generacion: int):
+        """
+        Caches an article read from the database, or None if it does not exist.
+
+        The entry is discarded if the SKU was written or invalidated since
+        `generacion` was read, since the row may predate a write committed in
+        between.
+
+        Args:
+            sku (str): The SKU.
+            articulo (dict): The article, or None if it does not exist.
+            generacion (int): The value of `generacion` before the article was read.
+        """
+        if self.tamano_maximo <= 0:
+            return
+        with self._lock:
+            ultima = max(self._escrituras.get(sku, (0, 0))[0], self._piso)
+            if ultima > generacion:
+                return
+            self._poner(sku, articulo)
+
+    def escribir(self, articulos: dict, cambio: int):
+        """
+        Caches the rows of a committed write (write-through).
+
+        A SKU whose cached row comes from a newer change is left as is, since
+        the hooks of two writes can run in a different order than their commits.
+
+        Args:
+            articulos (dict): The written articles by SKU (None for deleted articles).
+            cambio (int): The id of the last 'cambios' entry of the write, read inside its transaction.
+        """
+        if self.tamano_maximo <= 0:
+            return
+        cambio = cambio or 0
+        with self._lock:
+            self._generacion += 1
+            for sku, articulo in articulos.items():
+                if self._ultimo_cambio(sku) > cambio:
+                    self._anotar(sku, self._ultimo_cambio(sku))
+                    continue
+                self._anotar(sku, cambio)
+                self._poner(sku, dict(articulo) if articulo is not None else None)
+
+    def invalidar(self, skus=None):
+        """
+        Drops some SKUs from the cache, or every SKU.
+
+        Args:
+            skus (Iterable[str]): The SKUs to drop, or None to clear the cache.
+        """
+        with self._lock:
+            self._generacion += 1
+            if skus is None:
+                self._entradas.clear()
+                self._piso = self._generacion
+                return
+            for sku in skus:
+                self._entradas.pop(sku, None)
+                if self.tamano_maximo > 0:
+                    self._anotar(sku, self._ultimo_cambio(sku))
+
+    def invalidar_cambios(self, cambios: dict):
+        """
+        Drops the SKUs changed by entries of the 'cambios' table.
+
+        SKUs whose cached row was written by that change or a later one (by
+        this process, see `escribir`) are kept.
+
+        Args:
+            cambios (dict): The id of the last 'cambios' entry of each changed SKU.
+        """
+        with self._lock:
+            self._generacion += 1
+            for sku, cambio in cambios.items():
+                if self._ultimo_cambio(sku) >= cambio:
+                    continue
+                self._entradas.pop(sku, None)
+                if self.tamano_maximo > 0:
+                    self._anotar(sku, cambio)
+
+    def estadisticas(self) -> dict:
+        """
+        Reports the size and hit/miss counters of the cache.
+
+        Returns:
+            dict: The counters and the hit ratio.
+        """
+        with self._lock:
+            consultas = self.aciertos + self.aciertos_negativos + self.fallos
+            return {
+                "entradas": len(self._entradas),
+                "tamano_maximo": self.tamano_maximo,
+                "ttl": self.ttl,
+                "aciertos": self.aciertos,
+                "aciertos_negativos": self.aciertos_negativos,
+                "fallos": self.fallos,
+                "expulsiones": self.expulsiones,
+                "tasa_aciertos": round((self.aciertos + self.aciertos_negativos) / consultas, 4) if consultas else None,
+            }
+
+cache = CacheArticulos()
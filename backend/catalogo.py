@@ -0,0 +1,144 @@
+"""
+This module keeps an in-memory copy of the catalog of departments, classes and families.
+
+The catalog is loaded once and almost never changes, so the catalog endpoints
+answer from pre-serialized JSON held in memory. Any code that edits the
+catalog must call `cache.invalidar()` after committing.
+"""
+
+import hashlib
+import json
+import threading
+from sqlalchemy.orm import Session
+
+class Catalogo:
+    """
+    Immutable snapshot of the catalog, indexed for the catalog endpoints.
+
+    Attributes:
+        arbol (bytes): The JSON department -> class -> family tree.
+        departamentos (bytes): The JSON list of departments.
+        clases (dict): The JSON list of classes, keyed by department number.
+        familias (dict): The JSON list of families, keyed by (department number, class number).
+        claves (tuple): The catalog keys used to validate articles (see `crud._claves_catalogo`).
+        etag (str): The entity tag identifying this version of the catalog.
+    """
+
+    def __init__(self, arbol):
+        departamentos = []
+        clases = []
+        familias = []
+        for departamento in arbol:
+            departamentos.append({"numero": departamento["numero"], "nombre": departamento["nombre"]})
+            for clase in departamento["clases"]:
+                clases.append({"numero": clase["numero"], "nombre": clase["nombre"], "departamento_numero": departamento["numero"]})
+                for familia in clase["familias"]:
+                    familias.append({
+                        "numero": familia["numero"],
+                        "nombre": familia["nombre"],
+                        "departamento_numero": familia["departamento_numero"],
+                        "clase_numero": clase["numero"],
+                    })
+
+        self.arbol = _a_json(arbol)
+        self.departamentos = _a_json(departamentos)
+        self.clases = {}
+        self.familias = {}
+        for clase in clases:
+            self.clases.setdefault(clase["departamento_numero"], []).append(clase)
+        for familia in familias:
+            self.familias.setdefault((familia["departamento_numero"], familia["clase_numero"]), []).append(familia)
+        self.clases = {clave: _a_json(valor) for clave, valor in self.clases.items()}
+        self.familias = {clave: _a_json(valor) for clave, valor in self.familias.items()}
+
+        self.claves = (
+            {d["numero"] for d in departamentos},
+            {(c["departamento_numero"], c["numero"][len(c["departamento_numero"]):]) for c in clases},
+            {
+                (f["departamento_numero"], f["clase_numero"][len(f["departamento_numero"]):], f["numero"])
+                for f in familias
+            },
+        )
+        huella = hashlib.sha1(self.arbol).hexdigest()
+        self.etag = f'"{huella}"'
+
+def _a_json(valor) -> bytes:
+    """
+    Serializes a value to compact UTF-8 JSON.
+
+    Args:
+        valor: The value to serialize.
+
+    Returns:
+        bytes: The JSON document.
+    """
+    return json.dumps(valor, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+class CacheCatalogo:
+    """
+    Lazily built, explicitly invalidated cache of the catalog.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._catalogo = None
+
+    def obtener(self, db: Session) -> Catalogo:
+        """
+        Returns the cached catalog, loading it from the database if needed.
+
+        Args:
+            db (Session): The database session, only used on a cache miss.
+
+        Returns:
+            Catalogo: The current catalog.
+        """
+        catalogo = self._catalogo
+        if catalogo is None:
+            with self._lock:
+                if self._catalogo is None:
+                    self._catalogo = self._cargar(db)
+                catalogo = self._catalogo
+        return catalogo
+
+    def invalidar(self):
+        """
+        Discards the cached catalog so the next request reloads it.
+        """
+        with self._lock:
+            self._catalogo = None
+
+    @staticmethod
+    def _cargar(db: Session) -> Catalogo:
+        """
+        Loads the catalog from the database.
+
+        Args:
+            db (Session): The database session.
+
+        Returns:
+            Catalogo: The loaded catalog.
+        """
+        from . import crud
+
+        arbol = [
+            {
+                "numero": departamento.numero,
+                "nombre": departamento.nombre,
+                "clases": [
+                    {
+                        "numero": clase.numero,
+                        "nombre": clase.nombre,
+                        "familias": [
+                            {"numero": familia.numero, "nombre": familia.nombre, "departamento_numero": familia.departamento_numero}
+                            for familia in sorted(clase.familias, key=lambda f: f.numero)
+                        ],
+                    }
+                    for clase in sorted(departamento.clases, key=lambda c: c.numero)
+                ],
+            }
+            for departamento in crud.obtener_catalogo(db)
+        ]
+        return Catalogo(arbol)
+
+cache = CacheCatalogo()
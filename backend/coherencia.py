@@ -0,0 +1,149 @@
+"""
+This module keeps the in-memory caches of a worker coherent with writes made by other workers.
+
+Each process invalidates its own caches from `crud.registrar_escritura`, but
+with several workers a write served by one of them is invisible to the
+others. Every write to the tracked tables is recorded by SQLite triggers in
+the 'cambios' table, so a background thread polls the AUTOINCREMENT sequence
+of that table and applies the new entries to the SKU index, the article
+cache, the inventory reports and the catalog cache. If the entries were
+already pruned by an incremental export, or there are too many of them,
+every cache is dropped instead.
+
+The poller also prunes the change log (`export.podar_cambios`) every time
+ABCC_CAMBIOS_RETENCION new changes have been recorded, so the entries of
+tables that are never exported incrementally do not pile up.
+
+Polling runs in every process, whatever launched it (`servidor`, or
+`uvicorn --workers N` directly). With a single process it only re-applies
+its own writes, which costs one indexed read per interval.
+
+Configuration is read from the environment:
+    ABCC_COHERENCIA_INTERVALO: Seconds between polls (default 1, 0 disables polling).
+"""
+
+import logging
+import os
+import threading
+from sqlalchemy import select, text
+from . import cache_articulos, catalogo, export, indice_sku, models, reportes
+from .database import engine
+
+logger = logging.getLogger(__name__)
+
+INTERVALO = float(os.environ.get("ABCC_COHERENCIA_INTERVALO", "1"))
+
+# Above this many new changes every cache is dropped instead of reading them.
+LIMITE_CAMBIOS = 10000
+
+def _invalidar_todo():
+    """
+    Drops every in-memory cache; they are reloaded on next use.
+    """
+    indice_sku.indice.invalidar()
+    cache_articulos.cache.invalidar()
+    reportes.cache.invalidar()
+    catalogo.cache.invalidar()
+
+def _aplicar(cambios):
+    """
+    Applies change-log entries to the in-memory caches.
+
+    Args:
+        cambios (list): The (id, tabla, clave, operacion) entries, oldest first.
+    """
+    ultima_operacion = {}
+    ultimo_cambio = {}
+    catalogo_cambiado = False
+    for id_cambio, tabla, clave, operacion in cambios:
+        if tabla == "articulos":
+            ultima_operacion[clave] = operacion
+            ultimo_cambio[clave] = id_cambio
+        else:
+            catalogo_cambiado = True
+    if ultima_operacion:
+        indice_sku.indice.agregar(sku for sku, operacion in ultima_operacion.items() if operacion != "D")
+        indice_sku.indice.quitar(sku for sku, operacion in ultima_operacion.items() if operacion == "D")
+        cache_articulos.cache.invalidar_cambios(ultimo_cambio)
+        reportes.cache.invalidar()
+    if catalogo_cambiado:
+        catalogo.cache.invalidar()
+
+class Sincronizador:
+    """
+    Background poller of the 'cambios' table.
+    """
+
+    def __init__(self, intervalo: float = INTERVALO):
+        self.intervalo = intervalo
+        self._ultimo = None
+        self._podado = None
+        self._detener = threading.Event()
+        self._hilo = None
+
+    @staticmethod
+    def _secuencia(conn) -> int:
+        return conn.execute(text("SELECT seq FROM sqlite_sequence WHERE name = 'cambios'")).scalar() or 0
+
+    def sincronizar(self):
+        """
+        Applies the changes recorded since the previous call.
+        """
+        cambios = models.Cambio.__table__
+        with engine.connect() as conn:
+            ultimo = self._secuencia(conn)
+            if self._ultimo is None or ultimo == self._ultimo:
+                self._ultimo = ultimo
+                return
+            filas = []
+            if ultimo - self._ultimo <= LIMITE_CAMBIOS:
+                filas = conn.execute(
+                    select(cambios.c.id, cambios.c.tabla, cambios.c.clave, cambios.c.operacion)
+                    .where(cambios.c.id > self._ultimo, cambios.c.id <= ultimo)
+                    .order_by(cambios.c.id)
+                ).all()
+        # Missing ids were pruned before they could be read
+        if len(filas) < ultimo - self._ultimo:
+            _invalidar_todo()
+        else:
+            _aplicar(filas)
+        self._ultimo = ultimo
+
+    def podar(self):
+        """
+        Prunes the change log once every ABCC_CAMBIOS_RETENCION new changes.
+        """
+        ultimo = self._ultimo or 0
+        if self._podado is None or ultimo - self._podado >= export.RETENCION_CAMBIOS > 0:
+            export.podar_cambios()
+            self._podado = ultimo
+
+    def _ejecutar(self):
+        while not self._detener.wait(self.intervalo):
+            try:
+                self.sincronizar()
+                self.podar()
+            except Exception:
+                logger.exception("Error al sincronizar las cachés con la tabla de cambios")
+
+    def iniciar(self):
+        """
+        Records the current position of the change log and starts polling.
+        """
+        if self.intervalo <= 0:
+            return
+        self.sincronizar()
+        # The log was just pruned at startup
+        self._podado = self._ultimo
+        self._hilo = threading.Thread(target=self._ejecutar, name="coherencia", daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        """
+        Stops polling.
+        """
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join()
+
+sincronizador = Sincronizador()
@@ -2,10 +2,52 @@
 This module contains CRUD operations for managing articles, departments, classes, and families in the database.
 """
 
-from sqlalchemy.orm import Session
-from . import models
+import re
+from sqlalchemy import and_, bindparam, delete, insert, select, text, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, selectinload
+from pydantic import ValidationError
+from . import cache_articulos, catalogo, database, indice_sku, models, reportes
 from datetime import date
 
+# Number of rows written per multi-row INSERT / transaction in bulk operations.
+# Also keeps `IN (...)` lookups under SQLite's bound-parameter limit.
+TAMANO_LOTE = 500
+
+# Maximum number of SKUs accepted by a single batch lookup.
+LIMITE_CONSULTA_SKUS = 1000
+
+# Upper bound of `stock` and `cantidad` declared by models.ArticuloBase.
+MAXIMO_EXISTENCIAS = 999999999
+
+# Columns that can be requested with a `fields` projection.
+CAMPOS_ARTICULO = tuple(models.Articulo.__table__.columns.keys())
+
+# Id of the last entry of the change log; inside a write transaction, the last entry of that write.
+ULTIMO_CAMBIO = text("SELECT seq FROM sqlite_sequence WHERE name = 'cambios'")
+
+def registrar_escritura(creados=(), modificados=(), eliminados=(), filas=None, cambio=None):
+    """
+    Brings the in-memory article structures up to date after a committed write.
+
+    Every function that writes articles must call it after committing.
+
+    Args:
+        creados (Iterable[str]): The SKUs of the created articles.
+        modificados (Iterable[str]): The SKUs of the updated articles.
+        eliminados (Iterable[str]): The SKUs of the deleted articles.
+        filas (dict): The written rows by SKU (None for deleted articles), cached
+            by `cache_articulos` (write-through); the other SKUs are dropped from it.
+        cambio (int): With `filas`, the value of `ULTIMO_CAMBIO` read inside the write transaction.
+    """
+    creados, eliminados = list(creados), list(eliminados)
+    indice_sku.indice.agregar(creados)
+    indice_sku.indice.quitar(eliminados)
+    if filas:
+        cache_articulos.cache.escribir(filas, cambio)
+    cache_articulos.cache.invalidar([sku for sku in (*creados, *modificados, *eliminados) if sku not in (filas or {})])
+    reportes.cache.invalidar()
+
 def crear_articulo(db: Session, articulo: models.ArticuloCreate):
     """
     Creates a new article in the database.
@@ -15,7 +57,7 @@ def crear_articulo(db: Session, articulo: models.ArticuloCreate):
         articulo (models.ArticuloCreate): The article data to create.
 
     Returns:
-        models.Articulo: The created article.
+        dict: The created article, as returned by the INSERT.
 
     Raises:
         ValueError: If the quantity is greater than the stock.
@@ -23,24 +65,353 @@ def crear_articulo(db: Session, articulo: models.ArticuloCreate):
     if articulo.cantidad > articulo.stock:
         raise ValueError("La cantidad no puede ser mayor al stock")
     
-    db_articulo = models.Articulo(**articulo.dict(), fecha_alta=date.today(), descontinuado=0, fecha_baja=date(1900, 1, 1))
-    db.add(db_articulo)
+    tabla = models.Articulo.__table__
+    sentencia = insert(tabla).values(
+        **articulo.dict(), fecha_alta=date.today(), descontinuado=0, fecha_baja=date(1900, 1, 1)
+    ).returning(tabla)
+    database.iniciar_escritura(db)
+    db_articulo = dict(db.execute(sentencia).mappings().one())
+    cambio = db.execute(ULTIMO_CAMBIO).scalar()
     db.commit()
-    db.refresh(db_articulo)
+    registrar_escritura(creados=[db_articulo["sku"]], filas={db_articulo["sku"]: db_articulo}, cambio=cambio)
     return db_articulo
 
-def obtener_articulo(db: Session, sku: str):
+def parsear_campos(fields: str):
+    """
+    Parses a `fields` projection such as 'sku,stock'.
+
+    The SKU is always included, first, so clients can match the results.
+
+    Args:
+        fields (str): Comma-separated column names, or None/empty for all columns.
+
+    Returns:
+        List[str]: The requested columns, or None for all columns.
+
+    Raises:
+        ValueError: If a column does not exist.
+    """
+    if not fields:
+        return None
+    campos = list(dict.fromkeys(["sku"] + [campo.strip() for campo in fields.split(",") if campo.strip()]))
+    desconocidos = [campo for campo in campos if campo not in CAMPOS_ARTICULO]
+    if desconocidos:
+        raise ValueError(f"Campos desconocidos: {', '.join(desconocidos)}. Use: {', '.join(CAMPOS_ARTICULO)}")
+    return campos
+
+def columnas_articulo(campos):
+    """
+    Returns the columns to select for a projection returned by `parsear_campos`.
+    """
+    tabla = models.Articulo.__table__
+    return [tabla.c[campo] for campo in campos] if campos else [tabla]
+
+def _lotes(iterable, tamano: int):
+    """
+    Splits an iterable into lists of at most `tamano` elements.
+
+    Args:
+        iterable (Iterable): The items to split.
+        tamano (int): The maximum size of each chunk.
+
+    Yields:
+        list: The next chunk of items.
+    """
+    lote = []
+    for elemento in iterable:
+        lote.append(elemento)
+        if len(lote) >= tamano:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+def _claves_catalogo(db: Session):
+    """
+    Returns the valid catalog keys used to validate articles.
+
+    Class and family keys use the two-digit class number sent by the clients,
+    i.e. the class number without the department prefix.
+
+    Args:
+        db (Session): The database session, only used if the catalog cache is cold.
+
+    Returns:
+        tuple: Sets of valid departments, (department, class) pairs and
+        (department, class, family) triples.
+    """
+    return catalogo.cache.obtener(db).claves
+
+def _validar_articulo(articulo: models.ArticuloCreate, catalogo) -> str:
+    """
+    Checks an article against the business rules and the catalog.
+
+    Args:
+        articulo (models.ArticuloCreate): The article data to check.
+        catalogo (tuple): The catalog keys returned by `_claves_catalogo`.
+
+    Returns:
+        str: The error message, or None if the article is valid.
+    """
+    departamentos, clases, familias = catalogo
+    if articulo.cantidad > articulo.stock:
+        return "La cantidad no puede ser mayor al stock"
+    if articulo.departamento_numero not in departamentos:
+        return f"El departamento {articulo.departamento_numero} no existe"
+    if (articulo.departamento_numero, articulo.clase_numero) not in clases:
+        return f"La clase {articulo.clase_numero} no existe en el departamento {articulo.departamento_numero}"
+    if (articulo.departamento_numero, articulo.clase_numero, articulo.familia_numero) not in familias:
+        return f"La familia {articulo.familia_numero} no existe en la clase {articulo.clase_numero}"
+    return None
+
+def crear_articulos_bulk(db: Session, filas, tamano_lote: int = TAMANO_LOTE):
+    """
+    Creates many articles using chunked multi-row inserts.
+
+    Every row is validated (schema, `cantidad <= stock`, catalog keys and
+    duplicated SKUs) before it is written. Each chunk is written in its own
+    transaction, so an invalid row or a failing chunk never discards the rows
+    of the other chunks. That transaction checks for existing SKUs and inserts
+    under one write lock, and it always ends before the next chunk is read
+    from `filas`, which may be a request body still arriving.
+
+    Args:
+        db (Session): The database session.
+        filas (Iterable[dict]): The raw article rows to create.
+        tamano_lote (int): The number of rows written per transaction.
+
+    Returns:
+        dict: The number of inserted rows and a per-row error report.
+    """
+    resultado = {"insertados": 0, "errores": []}
+    errores = resultado["errores"]
+    catalogo = _claves_catalogo(db)
+    # A cold catalog cache is loaded in a read transaction; end it so that the
+    # first chunk starts its own write transaction.
+    db.rollback()
+    vistos = set()
+    hoy = date.today()
+
+    for lote in _lotes(enumerate(filas), tamano_lote):
+        validos = []
+        for indice, fila in lote:
+            if isinstance(fila, models.ArticuloCreate):
+                articulo = fila
+            elif not isinstance(fila, dict):
+                errores.append({"indice": indice, "sku": None, "error": "La fila no es un objeto JSON válido"})
+                continue
+            else:
+                try:
+                    articulo = models.ArticuloCreate(**fila)
+                except ValidationError as e:
+                    detalle = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+                    errores.append({"indice": indice, "sku": fila.get("sku"), "error": detalle})
+                    continue
+            error = _validar_articulo(articulo, catalogo)
+            if error is None and articulo.sku in vistos:
+                error = "SKU duplicado en la carga"
+            if error:
+                errores.append({"indice": indice, "sku": articulo.sku, "error": error})
+                continue
+            vistos.add(articulo.sku)
+            validos.append((indice, articulo))
+
+        if not validos:
+            continue
+
+        database.iniciar_escritura(db)
+        existentes = set(db.execute(
+            select(models.Articulo.sku).where(models.Articulo.sku.in_([a.sku for _, a in validos]))
+        ).scalars())
+        registros = []
+        for indice, articulo in validos:
+            if articulo.sku in existentes:
+                errores.append({"indice": indice, "sku": articulo.sku, "error": "El SKU ya existe"})
+            else:
+                registros.append(dict(articulo.dict(), fecha_alta=hoy, descontinuado=0, fecha_baja=date(1900, 1, 1)))
+
+        if not registros:
+            # Release the write lock before the next chunk is read from the client
+            db.rollback()
+            continue
+        try:
+            db.execute(insert(models.Articulo), registros)
+            db.commit()
+            registrar_escritura(creados=[registro["sku"] for registro in registros])
+            resultado["insertados"] += len(registros)
+        except Exception as e:
+            db.rollback()
+            for indice, articulo in validos:
+                if articulo.sku not in existentes:
+                    errores.append({"indice": indice, "sku": articulo.sku, "error": str(e)})
+
+    errores.sort(key=lambda error: error["indice"])
+    resultado["rechazados"] = len(errores)
+    return resultado
+
+def obtener_articulo(db: Session, sku: str, campos=None):
     """
     Retrieves an article from the database by its SKU.
 
+    The row is mapped straight to a dict, without building an ORM instance,
+    and is read through `cache_articulos` (missing SKUs included).
+
     Args:
         db (Session): The database session.
         sku (str): The SKU of the article to retrieve.
+        campos (List[str]): The columns to return (see `parsear_campos`), or None for all.
+
+    Returns:
+        dict: The retrieved article, or None if not found.
+    """
+    articulo = cache_articulos.cache.consultar(sku)
+    if articulo is cache_articulos.AUSENTE:
+        generacion = cache_articulos.cache.generacion
+        tabla = models.Articulo.__table__
+        fila = db.execute(select(tabla).where(tabla.c.sku == sku)).mappings().first()
+        articulo = dict(fila) if fila is not None else None
+        cache_articulos.cache.guardar(sku, articulo, generacion)
+    return proyectar(articulo, campos)
+
+def proyectar(articulo, campos):
+    """
+    Returns a copy of a cached article, restricted to some columns.
+
+    Args:
+        articulo (dict): The article, or None.
+        campos (List[str]): The columns to keep (see `parsear_campos`), or None for all.
+
+    Returns:
+        dict: The copy, or None if the article is None.
+    """
+    if articulo is None:
+        return None
+    if not campos:
+        return dict(articulo)
+    return {campo: articulo[campo] for campo in campos}
+
+def obtener_articulos(db: Session, skus, tamano_lote: int = TAMANO_LOTE):
+    """
+    Retrieves many articles by SKU with `WHERE sku IN (...)` queries.
+
+    The SKUs are queried in chunks to stay under SQLite's bound-parameter limit.
+
+    Args:
+        db (Session): The database session.
+        skus (List[str]): The SKUs to retrieve.
+        tamano_lote (int): The maximum number of SKUs per query.
+
+    Returns:
+        tuple: The found articles (as dicts, in request order) and the missing SKUs.
+
+    Raises:
+        ValueError: If more than LIMITE_CONSULTA_SKUS SKUs are requested.
+    """
+    skus = list(dict.fromkeys(skus))
+    if len(skus) > LIMITE_CONSULTA_SKUS:
+        raise ValueError(f"No se pueden consultar más de {LIMITE_CONSULTA_SKUS} SKUs a la vez")
+    tabla = models.Articulo.__table__
+    encontrados = {}
+    for lote in _lotes(skus, tamano_lote):
+        for fila in db.execute(select(tabla).where(tabla.c.sku.in_(lote))).mappings():
+            encontrados[fila["sku"]] = dict(fila)
+    articulos = [encontrados[sku] for sku in skus if sku in encontrados]
+    faltantes = [sku for sku in skus if sku not in encontrados]
+    return articulos, faltantes
+
+def buscar_articulos(db: Session, q: str, limite: int = 20):
+    """
+    Searches articles by name, brand and model with the FTS5 full-text index.
+
+    Every word of the query must match the start of a word of the article
+    (prefix search), and results are ranked by relevance (BM25).
+
+    Args:
+        db (Session): The database session.
+        q (str): The words to search for.
+        limite (int): The maximum number of results.
+
+    Returns:
+        List[dict]: The matching articles, most relevant first.
+    """
+    terminos = re.findall(r"\w+", q)
+    if not terminos:
+        return []
+    consulta = " ".join(f'"{termino}"*' for termino in terminos)
+    resultado = db.execute(
+        text(
+            "SELECT articulos.* FROM articulos_fts "
+            "JOIN articulos_fts_claves AS claves ON claves.id = articulos_fts.rowid "
+            "JOIN articulos ON articulos.sku = claves.sku "
+            "WHERE articulos_fts MATCH :consulta ORDER BY articulos_fts.rank LIMIT :limite"
+        ),
+        {"consulta": consulta, "limite": limite},
+    )
+    return [dict(fila) for fila in resultado.mappings()]
+
+def consulta_listado(filtros: dict, despues_de: str = None, limite: int = 100, campos=None):
+    """
+    Builds the query of one page of `listar_articulos`.
+
+    Args:
+        filtros (dict): Filters by column. Keys ending in `_desde`/`_hasta`
+            are inclusive date bounds, the rest are equality filters. None
+            values are ignored. `descontinuado=0` also matches legacy rows
+            where the flag is NULL.
+        despues_de (str): The last SKU of the previous page, or None for the first page.
+        limite (int): The maximum number of articles in the page.
+        campos (List[str]): The columns to return (see `parsear_campos`), or None for all.
+
+    Returns:
+        Select: The query, which fetches one row more than `limite`.
+    """
+    tabla = models.Articulo.__table__
+    consulta = select(*columnas_articulo(campos))
+    for nombre, valor in filtros.items():
+        if valor is None:
+            continue
+        if nombre.endswith("_desde"):
+            consulta = consulta.where(tabla.c[nombre[:-len("_desde")]] >= valor)
+        elif nombre.endswith("_hasta"):
+            consulta = consulta.where(tabla.c[nombre[:-len("_hasta")]] <= valor)
+        elif nombre == "descontinuado" and valor == 0:
+            consulta = consulta.where(tabla.c.descontinuado.is_not(1))
+        else:
+            consulta = consulta.where(tabla.c[nombre] == valor)
+    if despues_de is not None:
+        consulta = consulta.where(tabla.c.sku > despues_de)
+    return consulta.order_by(tabla.c.sku).limit(limite + 1)
+
+def listar_articulos(db: Session, filtros: dict, despues_de: str = None, limite: int = 100, campos=None):
+    """
+    Lists articles matching some filters, one page at a time.
+
+    Pages are fetched with keyset pagination on the SKU (`sku > despues_de`).
+    With equality filters on a prefix of the catalog columns, on the brand or
+    on discontinued articles, the filter and the seek share one index, so every
+    page costs the same no matter how deep into the listing it is. Active
+    articles (`descontinuado=0`, NULL included) are read by walking the SKU
+    index. Date ranges cannot be served in SKU order by an index, so SQLite
+    sorts the rows of the range or walks the SKU index instead.
+
+    Args:
+        db (Session): The database session.
+        filtros (dict): Filters by column (see `consulta_listado`).
+        despues_de (str): The last SKU of the previous page, or None for the first page.
+        limite (int): The maximum number of articles in the page.
+        campos (List[str]): The columns to return (see `parsear_campos`), or None for all.
 
     Returns:
-        models.Articulo: The retrieved article, or None if not found.
+        tuple: The articles of the page (as dicts) and the SKU to pass as
+        `despues_de` to get the next page, or None if this is the last page.
     """
-    return db.query(models.Articulo).filter(models.Articulo.sku == sku).first()
+    consulta = consulta_listado(filtros, despues_de, limite, campos)
+    articulos = [dict(fila) for fila in db.execute(consulta).mappings()]
+    siguiente = None
+    if len(articulos) > limite:
+        articulos = articulos[:limite]
+        siguiente = articulos[-1]["sku"]
+    return articulos, siguiente
 
 def actualizar_articulo(db: Session, sku: str, articulo: models.ArticuloUpdate):
     """
@@ -52,19 +423,114 @@ def actualizar_articulo(db: Session, sku: str, articulo: models.ArticuloUpdate):
         articulo (models.ArticuloUpdate): The updated article data.
 
     Returns:
-        models.Articulo: The updated article, or None if not found.
+        dict: The updated article, as returned by the UPDATE, or None if not found.
     """
-    db_articulo = db.query(models.Articulo).filter(models.Articulo.sku == sku).first()
-    if db_articulo:
-        update_data = articulo.dict(exclude_unset=True)
-        for key, value in update_data.items():
-            setattr(db_articulo, key, value)
-        if 'descontinuado' in update_data and update_data['descontinuado'] == 1:
-            db_articulo.fecha_baja = date.today()
-        db.commit()
-        db.refresh(db_articulo)
+    update_data = articulo.dict(exclude_unset=True)
+    if not update_data:
+        return obtener_articulo(db, sku)
+    if update_data.get('descontinuado') == 1:
+        update_data['fecha_baja'] = date.today()
+    tabla = models.Articulo.__table__
+    sentencia = update(tabla).where(tabla.c.sku == sku).values(**update_data).returning(tabla)
+    database.iniciar_escritura(db)
+    db_articulo = db.execute(sentencia).mappings().first()
+    if db_articulo is None:
+        db.rollback()
+        return None
+    db_articulo = dict(db_articulo)
+    cambio = db.execute(ULTIMO_CAMBIO).scalar()
+    db.commit()
+    registrar_escritura(modificados=[sku], filas={sku: db_articulo}, cambio=cambio)
     return db_articulo
 
+class ConflictoConcurrencia(Exception):
+    """
+    Raised when a batch write loses a race with another writer and is rolled back.
+    """
+
+def ajustar_stock(db: Session, ajustes, tamano_lote: int = TAMANO_LOTE):
+    """
+    Applies relative stock adjustments to many articles in one transaction.
+
+    Adjustments for the same SKU are added together. Each article is updated
+    with `stock = stock + :delta` in the database, with the invariants
+    (`0 <= cantidad <= stock <= MAXIMO_EXISTENCIAS`) checked in the same UPDATE, so concurrent
+    adjustments never overwrite each other. Adjustments for missing SKUs or
+    that would break the invariants are skipped and reported.
+
+    Args:
+        db (Session): The database session.
+        ajustes (Iterable[models.AjusteStock]): The adjustments to apply.
+        tamano_lote (int): The number of SKUs per lookup query.
+
+    Returns:
+        dict: The number of updated articles and a per-SKU error report.
+
+    Raises:
+        ConflictoConcurrencia: If another writer changed the articles meanwhile;
+        nothing is applied and the batch can be retried.
+    """
+    deltas = {}
+    for ajuste in ajustes:
+        delta_stock, delta_cantidad = deltas.get(ajuste.sku, (0, 0))
+        deltas[ajuste.sku] = (delta_stock + ajuste.delta_stock, delta_cantidad + ajuste.delta_cantidad)
+
+    tabla = models.Articulo.__table__
+    errores = []
+    validos = []
+    try:
+        database.iniciar_escritura(db)
+        for lote in _lotes(deltas, tamano_lote):
+            actuales = {
+                sku: (stock, cantidad)
+                for sku, stock, cantidad in db.execute(
+                    select(tabla.c.sku, tabla.c.stock, tabla.c.cantidad).where(tabla.c.sku.in_(lote))
+                )
+            }
+            for sku in lote:
+                delta_stock, delta_cantidad = deltas[sku]
+                if sku not in actuales:
+                    errores.append({"sku": sku, "error": "Artículo no encontrado"})
+                    continue
+                stock, cantidad = actuales[sku]
+                if stock + delta_stock < 0 or cantidad + delta_cantidad < 0:
+                    errores.append({"sku": sku, "error": "El stock y la cantidad no pueden ser negativos"})
+                elif stock + delta_stock > MAXIMO_EXISTENCIAS or cantidad + delta_cantidad > MAXIMO_EXISTENCIAS:
+                    errores.append({"sku": sku, "error": f"El stock y la cantidad no pueden ser mayores a {MAXIMO_EXISTENCIAS}"})
+                elif cantidad + delta_cantidad > stock + delta_stock:
+                    errores.append({"sku": sku, "error": "La cantidad no puede ser mayor al stock"})
+                else:
+                    validos.append({"b_sku": sku, "delta_stock": delta_stock, "delta_cantidad": delta_cantidad})
+
+        if validos:
+            nuevo_stock = tabla.c.stock + bindparam("delta_stock")
+            nueva_cantidad = tabla.c.cantidad + bindparam("delta_cantidad")
+            sentencia = (
+                update(tabla)
+                .where(and_(
+                    tabla.c.sku == bindparam("b_sku"),
+                    nuevo_stock >= 0,
+                    nueva_cantidad >= 0,
+                    nueva_cantidad <= nuevo_stock,
+                    nuevo_stock <= MAXIMO_EXISTENCIAS,
+                    nueva_cantidad <= MAXIMO_EXISTENCIAS,
+                ))
+                .values(stock=nuevo_stock, cantidad=nueva_cantidad)
+            )
+            resultado = db.connection().execute(sentencia, validos)
+            if resultado.rowcount != len(validos):
+                raise ConflictoConcurrencia("Otro proceso modificó los artículos; reintente el ajuste")
+        db.commit()
+        registrar_escritura(modificados=[valido["b_sku"] for valido in validos])
+    except ConflictoConcurrencia:
+        db.rollback()
+        raise
+    except OperationalError as e:
+        db.rollback()
+        raise ConflictoConcurrencia(str(e.orig)) from e
+
+    return {"aplicados": len(validos), "rechazados": len(errores), "errores": errores}
+
 def eliminar_articulo(db: Session, sku: str):
     """
     Deletes an article from the database.
@@ -74,14 +540,105 @@ def eliminar_articulo(db: Session, sku: str):
         sku (str): The SKU of the article to delete.
 
     Returns:
-        models.Articulo: The deleted article, or None if not found.
+        dict: The deleted article, or None if not found.
     """
-    db_articulo = db.query(models.Articulo).filter(models.Articulo.sku == sku).first()
-    if db_articulo:
-        db.delete(db_articulo)
-        db.commit()
+    tabla = models.Articulo.__table__
+    database.iniciar_escritura(db)
+    db_articulo = db.execute(delete(tabla).where(tabla.c.sku == sku).returning(tabla)).mappings().first()
+    if db_articulo is None:
+        db.rollback()
+        return None
+    db_articulo = dict(db_articulo)
+    cambio = db.execute(ULTIMO_CAMBIO).scalar()
+    db.commit()
+    registrar_escritura(eliminados=[sku], filas={sku: None}, cambio=cambio)
     return db_articulo
 
+def _condiciones_seleccion(seleccion: models.SeleccionArticulos, tamano_lote: int):
+    """
+    Builds the WHERE clauses selecting the articles of a bulk operation.
+
+    Long SKU lists are split so that each statement stays under SQLite's
+    bound-parameter limit; the catalog filters are added to every clause.
+
+    Args:
+        seleccion (models.SeleccionArticulos): The selection criteria.
+        tamano_lote (int): The maximum number of SKUs per clause.
+
+    Returns:
+        list: One WHERE clause per statement to execute.
+
+    Raises:
+        ValueError: If no criterion was given.
+    """
+    tabla = models.Articulo.__table__
+    filtros = [
+        tabla.c[nombre] == valor
+        for nombre, valor in seleccion.dict(exclude={"skus"}).items()
+        if valor is not None
+    ]
+    if seleccion.skus is None:
+        if not filtros:
+            raise ValueError("Debe indicar los SKUs o un departamento, clase o familia")
+        return [and_(*filtros)]
+    return [and_(tabla.c.sku.in_(lote), *filtros) for lote in _lotes(seleccion.skus, tamano_lote)]
+
+def eliminar_articulos(db: Session, seleccion: models.SeleccionArticulos, tamano_lote: int = TAMANO_LOTE):
+    """
+    Deletes many articles with set-based DELETE statements in one transaction.
+
+    Args:
+        db (Session): The database session.
+        seleccion (models.SeleccionArticulos): The articles to delete.
+        tamano_lote (int): The maximum number of SKUs per statement.
+
+    Returns:
+        int: The number of deleted articles.
+
+    Raises:
+        ValueError: If no criterion was given.
+    """
+    tabla = models.Articulo.__table__
+    eliminados = []
+    database.iniciar_escritura(db)
+    for condicion in _condiciones_seleccion(seleccion, tamano_lote):
+        eliminados += db.execute(delete(tabla).where(condicion).returning(tabla.c.sku)).scalars().all()
+    db.commit()
+    registrar_escritura(eliminados=eliminados)
+    return len(eliminados)
+
+def descontinuar_articulos(db: Session, seleccion: models.SeleccionArticulos, tamano_lote: int = TAMANO_LOTE):
+    """
+    Discontinues many articles with set-based UPDATE statements in one transaction.
+
+    Articles already discontinued keep their original `fecha_baja`.
+
+    Args:
+        db (Session): The database session.
+        seleccion (models.SeleccionArticulos): The articles to discontinue.
+        tamano_lote (int): The maximum number of SKUs per statement.
+
+    Returns:
+        int: The number of discontinued articles.
+
+    Raises:
+        ValueError: If no criterion was given.
+    """
+    tabla = models.Articulo.__table__
+    modificados = []
+    database.iniciar_escritura(db)
+    for condicion in _condiciones_seleccion(seleccion, tamano_lote):
+        sentencia = (
+            update(tabla)
+            .where(condicion, tabla.c.descontinuado.is_not(1))
+            .values(descontinuado=1, fecha_baja=date.today())
+            .returning(tabla.c.sku)
+        )
+        modificados += db.execute(sentencia).scalars().all()
+    db.commit()
+    registrar_escritura(modificados=modificados)
+    return len(modificados)
+
 def obtener_departamentos(db: Session):
     """
     Retrieves all departments from the database.
@@ -121,60 +678,92 @@ def obtener_familias(db: Session, departamento_numero: str, clase_numero: str):
     """
     return db.query(models.Familia).filter(models.Familia.departamento_numero == departamento_numero, models.Familia.clase_numero == clase_numero).all()
 
-def cargar_datos(db: Session):
+def obtener_catalogo(db: Session):
     """
-    Loads initial data into the database from a JSON file.
+    Retrieves the whole department -> class -> family tree from the database.
 
-    This function checks if data already exists in the database before loading.
-    It loads departments, classes, and families from the JSON file.
+    Classes and families are loaded eagerly with one extra query per level,
+    instead of one query per department and per class.
 
     Args:
         db (Session): The database session.
 
-    Raises:
-        Exception: If there's an error while loading the data.
+    Returns:
+        List[models.Departamento]: All departments with their classes and families loaded.
+    """
+    return (
+        db.query(models.Departamento)
+        .options(selectinload(models.Departamento.clases).selectinload(models.Clase.familias))
+        .order_by(models.Departamento.numero)
+        .all()
+    )
+
+def huella_archivo(ruta: str) -> str:
+    """
+    Computes the SHA-256 hash of a file's contents.
+
+    Args:
+        ruta (str): The path of the file.
+
+    Returns:
+        str: The hexadecimal digest.
+    """
+    import hashlib
+
+    sha = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+def sincronizar_catalogo(db: Session, ruta: str = "datos.json"):
     """
-    import json
-    from . import models
+    Loads the catalog from a JSON file only if it is missing or the file has changed.
+
+    The hash of the last loaded file is kept in the 'metadatos' table, so an
+    already initialized database is left untouched.
 
-    # Check if data already exists in the database
-    if db.query(models.Departamento).first():
+    Args:
+        db (Session): The database session.
+        ruta (str): The path of the catalog file.
+
+    Returns:
+        bool: True if the catalog was (re)loaded.
+    """
+    huella = huella_archivo(ruta)
+    guardada = db.get(models.Metadato, "catalogo_sha256")
+    if guardada is not None and guardada.valor == huella and db.query(models.Departamento).first():
         print("Los datos ya están cargados en la base de datos.")
-        return
-
-    with open("datos.json", "r") as f:
-        datos = json.load(f)
-
-    # Load departments
-    for departamento in datos["departamentos"]:
-        db_departamento = models.Departamento(numero=departamento["numero"], nombre=departamento["nombre"])
-        db.add(db_departamento)
-
-    # Load classes
-    for i, clase in enumerate(datos["clases"]):
-        departamento_numero = "1" if i < 2 else "2"
-        clase_numero = f"{departamento_numero}{clase['numero']}"
-        db_clase = models.Clase(numero=clase_numero, nombre=clase["nombre"], departamento_numero=departamento_numero)
-        db.add(db_clase)
-
-    # Load families
-    for i, departamento_familias in enumerate(datos["familias"]):
-        departamento_numero = str(i + 1)
-        for clase_numero, familias in departamento_familias.items():
-            clase_numero_completo = f"{departamento_numero}{clase_numero}"
-            for familia in familias:
-                db_familia = models.Familia(
-                    numero=familia["numero"], 
-                    nombre=familia["nombre"], 
-                    departamento_numero=departamento_numero,
-                    clase_numero=clase_numero_completo
-                )
-                db.add(db_familia)
+        return False
+    cargar_datos(db, ruta, huella)
+    return True
+
+def cargar_datos(db: Session, ruta: str = "datos.json", huella: str = None):
+    """
+    Loads the catalog into the database from a JSON file.
+
+    It merges departments, classes, and families from the JSON file into the
+    catalog already in the database, deleting the entries missing from the
+    file, in a single transaction (see `importacion`).
+
+    Args:
+        db (Session): The database session.
+        ruta (str): The path of the catalog file.
+        huella (str): The hash of the file, stored to detect later changes.
+
+    Raises:
+        Exception: If there's an error while loading the data.
+    """
+    from . import importacion
 
     try:
+        importacion.importar_archivo(db, ruta, "json", reemplazar=True, confirmar=False)
+        if huella is not None:
+            db.merge(models.Metadato(clave="catalogo_sha256", valor=huella))
         db.commit()
+        catalogo.cache.invalidar()
         print("Datos cargados exitosamente en la base de datos.")
     except Exception as e:
         db.rollback()
         print(f"Error al cargar los datos: {str(e)}")
-        raise
\ No newline at end of file
+        raise
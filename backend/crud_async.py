@@ -0,0 +1,114 @@
+"""
+This module contains async variants of the article CRUD operations in `crud`.
+
+They are used by the endpoints in `rutas_async` when the backend runs with
+`ABCC_DB_MODO=async`, so article lookups and writes await the database
+instead of holding a worker thread.
+"""
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import cache_articulos, crud, database, models
+from datetime import date
+
+async def crear_articulo(db: AsyncSession, articulo: models.ArticuloCreate):
+    """
+    Creates a new article in the database.
+
+    Args:
+        db (AsyncSession): The async database session.
+        articulo (models.ArticuloCreate): The article data to create.
+
+    Returns:
+        dict: The created article, as returned by the INSERT.
+
+    Raises:
+        ValueError: If the quantity is greater than the stock.
+    """
+    if articulo.cantidad > articulo.stock:
+        raise ValueError("La cantidad no puede ser mayor al stock")
+
+    tabla = models.Articulo.__table__
+    sentencia = insert(tabla).values(
+        **articulo.dict(), fecha_alta=date.today(), descontinuado=0, fecha_baja=date(1900, 1, 1)
+    ).returning(tabla)
+    await db.connection(execution_options=database.OPCION_ESCRITURA)
+    db_articulo = dict((await db.execute(sentencia)).mappings().one())
+    cambio = (await db.execute(crud.ULTIMO_CAMBIO)).scalar()
+    await db.commit()
+    crud.registrar_escritura(creados=[db_articulo["sku"]], filas={db_articulo["sku"]: db_articulo}, cambio=cambio)
+    return db_articulo
+
+async def obtener_articulo(db: AsyncSession, sku: str, campos=None):
+    """
+    Retrieves an article from the database by its SKU, through `cache_articulos`.
+
+    Args:
+        db (AsyncSession): The async database session.
+        sku (str): The SKU of the article to retrieve.
+        campos (List[str]): The columns to return (see `crud.parsear_campos`), or None for all.
+
+    Returns:
+        dict: The retrieved article, or None if not found.
+    """
+    articulo = cache_articulos.cache.consultar(sku)
+    if articulo is cache_articulos.AUSENTE:
+        generacion = cache_articulos.cache.generacion
+        tabla = models.Articulo.__table__
+        fila = (await db.execute(select(tabla).where(tabla.c.sku == sku))).mappings().first()
+        articulo = dict(fila) if fila is not None else None
+        cache_articulos.cache.guardar(sku, articulo, generacion)
+    return crud.proyectar(articulo, campos)
+
+async def actualizar_articulo(db: AsyncSession, sku: str, articulo: models.ArticuloUpdate):
+    """
+    Updates an existing article in the database.
+
+    Args:
+        db (AsyncSession): The async database session.
+        sku (str): The SKU of the article to update.
+        articulo (models.ArticuloUpdate): The updated article data.
+
+    Returns:
+        dict: The updated article, as returned by the UPDATE, or None if not found.
+    """
+    update_data = articulo.dict(exclude_unset=True)
+    if not update_data:
+        return await obtener_articulo(db, sku)
+    if update_data.get('descontinuado') == 1:
+        update_data['fecha_baja'] = date.today()
+    tabla = models.Articulo.__table__
+    sentencia = update(tabla).where(tabla.c.sku == sku).values(**update_data).returning(tabla)
+    await db.connection(execution_options=database.OPCION_ESCRITURA)
+    db_articulo = (await db.execute(sentencia)).mappings().first()
+    if db_articulo is None:
+        await db.rollback()
+        return None
+    db_articulo = dict(db_articulo)
+    cambio = (await db.execute(crud.ULTIMO_CAMBIO)).scalar()
+    await db.commit()
+    crud.registrar_escritura(modificados=[sku], filas={sku: db_articulo}, cambio=cambio)
+    return db_articulo
+
+async def eliminar_articulo(db: AsyncSession, sku: str):
+    """
+    Deletes an article from the database.
+
+    Args:
+        db (AsyncSession): The async database session.
+        sku (str): The SKU of the article to delete.
+
+    Returns:
+        dict: The deleted article, or None if not found.
+    """
+    tabla = models.Articulo.__table__
+    await db.connection(execution_options=database.OPCION_ESCRITURA)
+    db_articulo = (await db.execute(delete(tabla).where(tabla.c.sku == sku).returning(tabla))).mappings().first()
+    if db_articulo is None:
+        await db.rollback()
+        return None
+    db_articulo = dict(db_articulo)
+    cambio = (await db.execute(crud.ULTIMO_CAMBIO)).scalar()
+    await db.commit()
+    crud.registrar_escritura(eliminados=[sku], filas={sku: None}, cambio=cambio)
+    return db_articulo
@@ -1,30 +1,220 @@
-from sqlalchemy import create_engine
+import contextlib
+import os
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 # URL de la base de datos SQLite
 SQLALCHEMY_DATABASE_URL = "sqlite:///./sql_app.db"
 
+# Modo de acceso de los endpoints de artículos: "sync" (hilos + Session) o
+# "async" (AsyncSession sobre aiosqlite), configurable con ABCC_DB_MODO
+DB_MODO = os.environ.get("ABCC_DB_MODO", "sync").lower()
+if DB_MODO not in ("sync", "async"):
+    raise ValueError(f"ABCC_DB_MODO debe ser 'sync' o 'async', no '{DB_MODO}'")
+
+# URL equivalente para el driver asíncrono
+ASYNC_DATABASE_URL = SQLALCHEMY_DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
+
+# Perfil de rendimiento de SQLite, aplicado con PRAGMAs a cada conexión nueva.
+# Con ABCC_SQLITE_PERFIL=predeterminado se conservan los valores por omisión de SQLite.
+# - journal_mode=WAL: los lectores no bloquean al escritor ni el escritor a los lectores
+# - synchronous=NORMAL: con WAL es seguro ante caídas del proceso y evita un fsync por commit
+# - cache_size negativo: tamaño de la caché de páginas en KiB
+# - busy_timeout: milisegundos que una conexión espera un bloqueo antes de fallar
+PERFIL_SQLITE = {
+    "journal_mode": os.environ.get("ABCC_SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.environ.get("ABCC_SQLITE_SYNCHRONOUS", "NORMAL"),
+    "cache_size": int(os.environ.get("ABCC_SQLITE_CACHE_SIZE", "-65536")),
+    "mmap_size": int(os.environ.get("ABCC_SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "temp_store": os.environ.get("ABCC_SQLITE_TEMP_STORE", "MEMORY"),
+    "busy_timeout": int(os.environ.get("ABCC_SQLITE_BUSY_TIMEOUT", "5000")),
+}
+if os.environ.get("ABCC_SQLITE_PERFIL", "rendimiento").lower() == "predeterminado":
+    PERFIL_SQLITE = {}
+
+# Tamaño del pool de conexiones: SQLite admite un solo escritor, así que más
+# conexiones solo ayudan a las lecturas concurrentes
+POOL_SIZE = int(os.environ.get("ABCC_DB_POOL_SIZE", "8"))
+POOL_MAX_OVERFLOW = int(os.environ.get("ABCC_DB_POOL_MAX_OVERFLOW", "8"))
+
+def aplicar_perfil_sqlite(engine, perfil=None):
+    """
+    Registra un evento 'connect' que aplica el perfil de PRAGMAs a cada conexión nueva del motor.
+
+    Args:
+        engine (Engine): Motor síncrono (para uno asíncrono, su `sync_engine`).
+        perfil (dict): PRAGMAs a aplicar; por omisión PERFIL_SQLITE.
+    """
+    perfil = PERFIL_SQLITE if perfil is None else perfil
+
+    @event.listens_for(engine, "connect")
+    def _aplicar_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma, valor in perfil.items():
+            cursor.execute(f"PRAGMA {pragma}={valor}")
+        cursor.close()
+
+# Opción de ejecución de las transacciones de escritura (ver iniciar_escritura)
+OPCION_ESCRITURA = {"sqlite_escritura": True}
+
+def aplicar_transacciones_sqlite(engine):
+    """
+    Hace que SQLAlchemy, y no el driver, emita el BEGIN de cada transacción.
+
+    Las transacciones con la opción OPCION_ESCRITURA empiezan con BEGIN
+    IMMEDIATE: toman el bloqueo de escritura de SQLite al empezar, así que los
+    escritores de todos los procesos esperan su turno (hasta busy_timeout) en
+    lugar de fallar con "database is locked" al pasar de leer a escribir.
+
+    Args:
+        engine (Engine): Motor síncrono (para uno asíncrono, su `sync_engine`).
+    """
+    @event.listens_for(engine, "connect")
+    def _desactivar_begin_del_driver(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin(conn):
+        inmediata = conn.get_execution_options().get("sqlite_escritura", False)
+        conn.exec_driver_sql("BEGIN IMMEDIATE" if inmediata else "BEGIN")
+
+def iniciar_escritura(db):
+    """
+    Empieza la transacción de una sesión como transacción de escritura (BEGIN IMMEDIATE).
+
+    Debe llamarse antes de la primera consulta de la transacción; si la sesión
+    ya tiene una transacción en curso, se conserva esa.
+
+    Args:
+        db (Session): Sesión de base de datos.
+
+    Returns:
+        Connection: La conexión de la transacción.
+    """
+    if db.in_transaction():
+        return db.connection()
+    return db.connection(execution_options=OPCION_ESCRITURA)
+
+def crear_motor(url=SQLALCHEMY_DATABASE_URL, perfil=None):
+    """
+    Crea un motor de base de datos SQLite con el perfil de rendimiento y el pool configurados.
+
+    Args:
+        url (str): URL de la base de datos.
+        perfil (dict): PRAGMAs a aplicar; por omisión PERFIL_SQLITE.
+
+    Returns:
+        Engine: El motor de base de datos.
+    """
+    motor = create_engine(
+        url,
+        connect_args={"check_same_thread": False},
+        pool_size=POOL_SIZE,
+        max_overflow=POOL_MAX_OVERFLOW,
+    )
+    aplicar_perfil_sqlite(motor, perfil)
+    aplicar_transacciones_sqlite(motor)
+    return motor
+
 # Crear motor de base de datos
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+engine = crear_motor()
 
 # Crear una fábrica de sesiones con autocommit y autoflush deshabilitados
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Motor y fábrica de sesiones asíncronas, solo en modo "async" (requiere aiosqlite)
+async_engine = None
+AsyncSessionLocal = None
+if DB_MODO == "async":
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL, pool_size=POOL_SIZE, max_overflow=POOL_MAX_OVERFLOW
+    )
+    aplicar_perfil_sqlite(async_engine.sync_engine)
+    aplicar_transacciones_sqlite(async_engine.sync_engine)
+    AsyncSessionLocal = sessionmaker(
+        bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+
+def _descartar_conexiones_heredadas():
+    """
+    Descarta, en el proceso hijo de un fork, las conexiones heredadas del padre
+    sin cerrarlas (siguen siendo del padre); el hijo abre las suyas.
+    """
+    engine.dispose(close=False)
+    if async_engine is not None:
+        async_engine.sync_engine.dispose(close=False)
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_descartar_conexiones_heredadas)
+
+# Archivo de bloqueo que serializa la inicialización entre procesos
+RUTA_BLOQUEO = f"{make_url(SQLALCHEMY_DATABASE_URL).database}.lock"
+
+@contextlib.contextmanager
+def bloqueo_arranque(ruta=RUTA_BLOQUEO):
+    """
+    Bloqueo exclusivo entre procesos para la inicialización de la base de datos.
+
+    Con varios workers, solo uno a la vez aplica las migraciones y carga el
+    catálogo; los demás esperan y encuentran la base ya inicializada.
+
+    Args:
+        ruta (str): Archivo de bloqueo.
+    """
+    with open(ruta, "a+b") as archivo:
+        try:
+            import fcntl
+        except ImportError:  # Windows
+            import msvcrt
+            import time
+
+            archivo.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(archivo.fileno(), msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.1)
+            try:
+                yield
+            finally:
+                archivo.seek(0)
+                msvcrt.locking(archivo.fileno(), msvcrt.LK_UNLCK, 1)
+            return
+        fcntl.flock(archivo.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(archivo.fileno(), fcntl.LOCK_UN)
+
 # Crear una clase base para los modelos ORM
 Base = declarative_base()
 
 def init_db():
     """
-    Inicializa la base de datos, eliminando todas las tablas existentes y 
-    creando nuevas tablas según las definiciones de los modelos ORM.
+    Inicializa la base de datos sin borrar datos, aplicando las migraciones pendientes.
+
+    Es idempotente: sobre una base ya actualizada solo consulta la versión del
+    esquema, por lo que puede ejecutarse en cada arranque.
+    """
+    from . import migraciones
+
+    migraciones.migrar(engine)
+
+def reset_db():
+    """
+    Elimina todas las tablas de la base de datos y las vuelve a crear desde cero.
 
     Esta función debe ser usada con precaución en entornos de producción 
     ya que elimina todos los datos existentes en la base de datos.
     """
+    from . import migraciones
+
     # Eliminar todas las tablas existentes en la base de datos
     Base.metadata.drop_all(bind=engine)
-    # Crear todas las tablas definidas en los modelos ORM
-    Base.metadata.create_all(bind=engine)
+    # Crear el esquema aplicando todas las migraciones
+    migraciones.migrar(engine)
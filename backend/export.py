@@ -0,0 +1,357 @@
+"""
+This module streams the contents of the database tables as CSV, Parquet or Arrow IPC files.
+
+Rows are read from a server-side cursor in fixed-size chunks, so the memory
+used by an export does not depend on the size of the table. Incremental
+exports only include the rows recorded in the 'cambios' table since the
+previous incremental export of the same table.
+
+The Parquet and Arrow formats need `pyarrow`; their schema is derived from the
+column types declared in `models`, so codes such as '01' stay strings.
+
+Configuration is read from the environment:
+    ABCC_CAMBIOS_RETENCION: Most recent changes kept for tables never exported
+        incrementally, 0 to keep all (default 10000).
+"""
+
+import csv
+import io
+import os
+import zlib
+from datetime import datetime
+from sqlalchemy import Date, DateTime, Integer, String, delete, func, literal, select
+from sqlalchemy.dialects.sqlite import insert
+from . import models
+from .database import OPCION_ESCRITURA, engine
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover - only the CSV format is available
+    pyarrow = None
+
+# Number of rows fetched from the cursor and encoded per chunk.
+TAMANO_BLOQUE = 1000
+
+RETENCION_CAMBIOS = int(os.environ.get("ABCC_CAMBIOS_RETENCION", "10000"))
+
+# Number of rows per Parquet row group / Arrow record batch.
+TAMANO_GRUPO_FILAS = 50000
+
+# Formats that are written with pyarrow, with their media type.
+FORMATOS_ARROW = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.file",
+}
+
+def tablas_exportables():
+    """
+    Lists the tables that can be exported.
+
+    Returns:
+        List[str]: The names of the exportable tables.
+    """
+    return sorted(models.TABLAS_RASTREADAS)
+
+def obtener_tabla(nombre: str):
+    """
+    Looks up an exportable table by its name.
+
+    Args:
+        nombre (str): The name of the table.
+
+    Returns:
+        Table: The table, or None if it is not exportable.
+    """
+    if nombre not in models.TABLAS_RASTREADAS:
+        return None
+    return models.Base.metadata.tables[nombre]
+
+def _codificar_csv(filas) -> bytes:
+    """
+    Encodes a list of rows as UTF-8 CSV.
+
+    Args:
+        filas (list): The rows to encode.
+
+    Returns:
+        bytes: The encoded rows.
+    """
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(filas)
+    return buffer.getvalue().encode("utf-8")
+
+def filas_csv(tabla, tamano_bloque: int = TAMANO_BLOQUE):
+    """
+    Streams a table as CSV, header first.
+
+    The connection is held only while the generator is consumed and the rows
+    are fetched `tamano_bloque` at a time, ordered by primary key.
+
+    Args:
+        tabla (Table): The table to export.
+        tamano_bloque (int): The number of rows per chunk.
+
+    Yields:
+        bytes: The next chunk of the CSV file.
+    """
+    yield _codificar_csv([tabla.columns.keys()])
+    consulta = select(tabla).order_by(*tabla.primary_key.columns)
+    with engine.connect() as conn:
+        resultado = conn.execution_options(stream_results=True, yield_per=tamano_bloque).execute(consulta)
+        for bloque in resultado.partitions(tamano_bloque):
+            yield _codificar_csv(bloque)
+
+def preparar_delta(tabla):
+    """
+    Computes the range of changes an incremental export of a table must include.
+
+    Args:
+        tabla (Table): The table to export.
+
+    Returns:
+        tuple: The watermark of the previous export (None if the table was
+        never exported incrementally) and the id of the last change to
+        include, or None if the table has not changed since the previous export.
+    """
+    cambios = models.Cambio.__table__
+    marcas = models.MarcaExportacion.__table__
+    with engine.connect() as conn:
+        hasta = conn.execute(
+            select(func.coalesce(func.max(cambios.c.id), 0)).where(cambios.c.tabla == tabla.name)
+        ).scalar()
+        desde = conn.execute(
+            select(marcas.c.ultimo_cambio).where(marcas.c.tabla == tabla.name)
+        ).scalar()
+    if desde is not None and hasta <= desde:
+        return None
+    return desde, hasta
+
+def _consulta_delta(tabla, desde, hasta: int):
+    """
+    Builds the query of the rows of a table changed in the range `(desde, hasta]`.
+
+    The first column, `operacion`, holds the last change recorded for each key:
+    'I' or 'U' carry the current row and 'D' carries only the key. Without a
+    previous watermark the whole table is selected as 'I' rows.
+
+    Args:
+        tabla (Table): The table to export.
+        desde (int): The watermark of the previous export, or None.
+        hasta (int): The id of the last change to include.
+
+    Returns:
+        Select: The query, ordered by key.
+    """
+    if desde is None:
+        return select(literal("I"), tabla).order_by(*tabla.primary_key.columns)
+    cambios = models.Cambio.__table__
+    clave = tabla.c[models.TABLAS_RASTREADAS[tabla.name]]
+    ultimos = (
+        select(cambios.c.clave, func.max(cambios.c.id).label("id"))
+        .where(cambios.c.tabla == tabla.name, cambios.c.id > desde, cambios.c.id <= hasta)
+        .group_by(cambios.c.clave)
+        .subquery()
+    )
+    columnas = [func.coalesce(clave, ultimos.c.clave) if c is clave else c for c in tabla.columns]
+    return (
+        select(cambios.c.operacion, *columnas)
+        .select_from(ultimos)
+        .join(cambios, cambios.c.id == ultimos.c.id)
+        .outerjoin(tabla, clave == ultimos.c.clave)
+        .order_by(ultimos.c.clave)
+    )
+
+def filas_csv_delta(tabla, desde, hasta: int, tamano_bloque: int = TAMANO_BLOQUE):
+    """
+    Streams the rows of a table changed in the range `(desde, hasta]` as CSV.
+
+    Each row is prefixed with an `operacion` column holding the last change
+    recorded for its key: 'I' or 'U' carry the current row (to be upserted) and
+    'D' carries only the key. Without a previous watermark the whole table is
+    streamed as 'I' rows. Once the last chunk has been produced the watermark
+    is advanced to `hasta` and the exported change-log entries are pruned, so
+    an interrupted download is retried in full on the next export.
+
+    Args:
+        tabla (Table): The table to export.
+        desde (int): The watermark of the previous export, or None.
+        hasta (int): The id of the last change to include.
+        tamano_bloque (int): The number of rows per chunk.
+
+    Yields:
+        bytes: The next chunk of the CSV file.
+    """
+    consulta = _consulta_delta(tabla, desde, hasta)
+    yield _codificar_csv([["operacion"] + tabla.columns.keys()])
+    with engine.connect() as conn:
+        resultado = conn.execution_options(stream_results=True, yield_per=tamano_bloque).execute(consulta)
+        for bloque in resultado.partitions(tamano_bloque):
+            yield _codificar_csv(bloque)
+
+    _avanzar_marca(tabla.name, hasta)
+
+def _avanzar_marca(tabla: str, hasta: int):
+    """
+    Records `hasta` as the watermark of a table and prunes the exported changes.
+
+    Args:
+        tabla (str): The name of the exported table.
+        hasta (int): The id of the last exported change.
+    """
+    marcas = models.MarcaExportacion.__table__
+    cambios = models.Cambio.__table__
+    with engine.execution_options(**OPCION_ESCRITURA).begin() as conn:
+        conn.execute(
+            insert(marcas)
+            .values(tabla=tabla, ultimo_cambio=hasta, fecha=datetime.now())
+            .on_conflict_do_update(index_elements=[marcas.c.tabla], set_={"ultimo_cambio": hasta, "fecha": datetime.now()})
+        )
+        conn.execute(delete(cambios).where(cambios.c.tabla == tabla, cambios.c.id <= hasta))
+
+def podar_cambios(retencion: int = RETENCION_CAMBIOS) -> int:
+    """
+    Prunes the changes that no incremental export will read.
+
+    The changes of a table with a watermark are pruned when it is exported, and
+    the ones after its watermark are kept for its next export. The first
+    incremental export of a table is a full one, so the changes of a table
+    never exported incrementally are only read by the cache coherence poller:
+    all but the `retencion` most recent changes are deleted.
+
+    Args:
+        retencion (int): The number of most recent changes to keep, 0 to keep all.
+
+    Returns:
+        int: The number of deleted changes.
+    """
+    if retencion <= 0:
+        return 0
+    cambios = models.Cambio.__table__
+    marcas = models.MarcaExportacion.__table__
+    with engine.execution_options(**OPCION_ESCRITURA).begin() as conn:
+        ultimo = conn.execute(select(func.coalesce(func.max(cambios.c.id), 0))).scalar()
+        if ultimo <= retencion:
+            return 0
+        return conn.execute(
+            delete(cambios).where(
+                cambios.c.id <= ultimo - retencion,
+                cambios.c.tabla.not_in(select(marcas.c.tabla)),
+            )
+        ).rowcount
+
+def comprimir_gzip(bloques):
+    """
+    Compresses a stream of chunks into a single gzip stream.
+
+    Args:
+        bloques (Iterable[bytes]): The chunks to compress.
+
+    Yields:
+        bytes: The next chunk of the gzip stream.
+    """
+    compresor = zlib.compressobj(wbits=31)
+    for bloque in bloques:
+        comprimido = compresor.compress(bloque)
+        if comprimido:
+            yield comprimido
+    yield compresor.flush()
+
+def esquema_arrow(tabla, incremental: bool = False):
+    """
+    Builds the Arrow schema of a table from the column types declared in `models`.
+
+    Args:
+        tabla (Table): The table to export.
+        incremental (bool): Whether to prepend the `operacion` column of incremental exports.
+
+    Returns:
+        pyarrow.Schema: The schema, with the nullability of each column.
+    """
+    tipos = (
+        (DateTime, pyarrow.timestamp("us")),
+        (Date, pyarrow.date32()),
+        (Integer, pyarrow.int64()),
+        (String, pyarrow.string()),
+    )
+    campos = [pyarrow.field("operacion", pyarrow.string(), nullable=False)] if incremental else []
+    for columna in tabla.columns:
+        tipo = next((arrow for sql, arrow in tipos if isinstance(columna.type, sql)), pyarrow.string())
+        # In an incremental export deleted rows only carry their key.
+        nullable = columna.nullable or (incremental and not columna.primary_key)
+        campos.append(pyarrow.field(columna.name, tipo, nullable=nullable))
+    return pyarrow.schema(campos)
+
+class _Sumidero(io.RawIOBase):
+    """
+    Write-only file that keeps the written bytes until they are drained,
+    so a pyarrow writer can be streamed chunk by chunk.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._partes = []
+        self._posicion = 0
+
+    def writable(self):
+        return True
+
+    def write(self, datos):
+        self._partes.append(bytes(datos))
+        self._posicion += len(datos)
+        return len(datos)
+
+    def tell(self):
+        return self._posicion
+
+    def drenar(self) -> bytes:
+        datos = b"".join(self._partes)
+        self._partes = []
+        return datos
+
+def filas_arrow(tabla, formato: str, rango=None, tamano_grupo: int = TAMANO_GRUPO_FILAS):
+    """
+    Streams a table as a Parquet or Arrow IPC file.
+
+    Rows are fetched `tamano_grupo` at a time from a server-side cursor and
+    each chunk is written as one Parquet row group or Arrow record batch. With
+    `rango` only the rows changed in that range are streamed, with a leading
+    `operacion` column, and the watermark is advanced after the last chunk as
+    in `filas_csv_delta`.
+
+    Args:
+        tabla (Table): The table to export.
+        formato (str): 'parquet' or 'arrow'.
+        rango (tuple): The `(desde, hasta)` range from `preparar_delta`, or None for a full export.
+        tamano_grupo (int): The number of rows per row group.
+
+    Yields:
+        bytes: The next chunk of the file.
+    """
+    esquema = esquema_arrow(tabla, incremental=rango is not None)
+    if rango is None:
+        consulta = select(tabla).order_by(*tabla.primary_key.columns)
+    else:
+        consulta = _consulta_delta(tabla, *rango)
+
+    sumidero = _Sumidero()
+    if formato == "parquet":
+        escritor = pyarrow.parquet.ParquetWriter(sumidero, esquema, compression="zstd")
+    else:
+        escritor = pyarrow.ipc.new_file(sumidero, esquema)
+    with engine.connect() as conn:
+        resultado = conn.execution_options(stream_results=True, yield_per=tamano_grupo).execute(consulta)
+        for bloque in resultado.partitions(tamano_grupo):
+            columnas = zip(*bloque)
+            lote = pyarrow.record_batch(
+                [pyarrow.array(valores, type=campo.type) for campo, valores in zip(esquema, columnas)],
+                schema=esquema,
+            )
+            escritor.write_batch(lote)
+            yield sumidero.drenar()
+    escritor.close()
+    yield sumidero.drenar()
+
+    if rango is not None:
+        _avanzar_marca(tabla.name, rango[1])
\ No newline at end of file
@@ -0,0 +1,340 @@
+"""
+This module imports catalogs of departments, classes and families of any size.
+
+Catalog files are read with an incremental parser (`ijson` for JSON, the `csv`
+module for CSV), so only one department subtree or CSV row is in memory at a
+time. Parent keys are derived from the data itself and the rows are written
+with bulk upserts (`INSERT ... ON CONFLICT DO UPDATE` executed as
+`executemany`), in chunks, inside one transaction.
+
+Supported formats:
+    - JSON tree: a list of departments (or an object with a `departamentos`
+      list) where each department has `clases` and each class `familias`,
+      as returned by `GET /catalogo`.
+    - Legacy JSON (`datos.json`): parallel `departamentos`, `clases` and
+      `familias` lists, where `familias[i]` maps the class numbers of the
+      i-th department to its families and `clases` lists those classes in
+      the same order.
+    - CSV with the columns departamento_numero, departamento_nombre,
+      clase_numero, clase_nombre, familia_numero and familia_nombre, one
+      row per family.
+
+Class numbers may be given with the department prefix (as stored, '101') or
+without it (as sent in articles, '01').
+
+Usage:
+    python -m backend.importacion catalogo.json [--reemplazar]
+"""
+
+import csv
+import io
+import json
+from sqlalchemy import delete, func, or_, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+from . import catalogo, database, models
+
+try:
+    import ijson
+except ImportError:  # pragma: no cover - falls back to loading the whole document
+    ijson = None
+
+# Number of rows per executemany batch.
+TAMANO_LOTE = 1000
+
+TABLAS = {
+    "departamento": models.Departamento.__table__,
+    "clase": models.Clase.__table__,
+    "familia": models.Familia.__table__,
+}
+
+def _numero_clase(departamento_numero: str, clase_numero: str) -> str:
+    """
+    Returns the stored class number, adding the department prefix if missing.
+
+    Args:
+        departamento_numero (str): The department number.
+        clase_numero (str): The class number, with or without the department prefix.
+
+    Returns:
+        str: The class number with the department prefix.
+    """
+    if len(clase_numero) > 2 and clase_numero.startswith(departamento_numero):
+        return clase_numero
+    return f"{departamento_numero}{clase_numero}"
+
+def _items(archivo, prefijo: str):
+    """
+    Iterates over the items under a JSON prefix, incrementally if `ijson` is installed.
+
+    Args:
+        archivo: A binary file object positioned at the start of the document.
+        prefijo (str): The ijson prefix of the items (e.g. 'departamentos.item').
+
+    Yields:
+        The decoded items.
+    """
+    archivo.seek(0)
+    if ijson is not None:
+        try:
+            yield from ijson.items(archivo, prefijo, use_float=True)
+        except ijson.JSONError as e:
+            raise ValueError(f"JSON inválido: {e}") from e
+        return
+    documento = json.load(archivo)
+    partes = prefijo.split(".")
+    for parte in partes[:-1]:
+        if parte != "item":
+            documento = documento.get(parte, [])
+    yield from documento
+
+def _filas_arbol(departamentos):
+    """
+    Flattens a stream of department subtrees into catalog rows.
+
+    Args:
+        departamentos (Iterable[dict]): The departments with their classes and families.
+
+    Yields:
+        tuple: The row type and the row values.
+    """
+    for departamento in departamentos:
+        numero = str(departamento["numero"])
+        yield "departamento", {"numero": numero, "nombre": departamento["nombre"]}
+        for clase in departamento.get("clases", []):
+            clase_numero = _numero_clase(numero, str(clase["numero"]))
+            yield "clase", {"numero": clase_numero, "nombre": clase["nombre"], "departamento_numero": numero}
+            for familia in clase.get("familias", []):
+                yield "familia", {
+                    "numero": str(familia["numero"]),
+                    "nombre": familia["nombre"],
+                    "departamento_numero": numero,
+                    "clase_numero": clase_numero,
+                }
+
+def _filas_legado(archivo):
+    """
+    Reads a catalog in the legacy `datos.json` layout.
+
+    Departments and classes (a few rows each) are buffered, the families are
+    streamed department by department. The department of each class is
+    derived from the class numbers listed under that department in `familias`.
+
+    Args:
+        archivo: A binary file object with the catalog.
+
+    Yields:
+        tuple: The row type and the row values.
+
+    Raises:
+        ValueError: If the classes do not match the classes listed in `familias`.
+    """
+    departamentos = []
+    for departamento in list(_items(archivo, "departamentos.item")):
+        departamentos.append(str(departamento["numero"]))
+        yield "departamento", {"numero": str(departamento["numero"]), "nombre": departamento["nombre"]}
+
+    clases = iter(list(_items(archivo, "clases.item")))
+    for i, familias_departamento in enumerate(_items(archivo, "familias.item")):
+        if i >= len(departamentos):
+            raise ValueError(f"'familias' tiene más entradas que 'departamentos' ({len(departamentos)})")
+        departamento_numero = departamentos[i]
+        for clase_numero, familias in familias_departamento.items():
+            clase = next(clases, None)
+            if clase is None or str(clase["numero"]) != clase_numero:
+                raise ValueError(f"La clase {clase_numero} del departamento {departamento_numero} no coincide con 'clases'")
+            clase_numero = _numero_clase(departamento_numero, clase_numero)
+            yield "clase", {"numero": clase_numero, "nombre": clase["nombre"], "departamento_numero": departamento_numero}
+            for familia in familias:
+                yield "familia", {
+                    "numero": str(familia["numero"]),
+                    "nombre": familia["nombre"],
+                    "departamento_numero": departamento_numero,
+                    "clase_numero": clase_numero,
+                }
+
+def _filas_json(archivo):
+    """
+    Reads a JSON catalog, detecting whether it is a tree or the legacy layout.
+
+    Args:
+        archivo: A binary file object with the catalog.
+
+    Yields:
+        tuple: The row type and the row values.
+    """
+    archivo.seek(0)
+    inicio = archivo.read(4096).lstrip()
+    if inicio.startswith(b"["):
+        yield from _filas_arbol(_items(archivo, "item"))
+        return
+    primero = next(_items(archivo, "departamentos.item"), None)
+    if primero is not None and "clases" in primero:
+        yield from _filas_arbol(_items(archivo, "departamentos.item"))
+    else:
+        yield from _filas_legado(archivo)
+
+def _filas_csv(archivo):
+    """
+    Reads a CSV catalog with one row per family.
+
+    Args:
+        archivo: A binary file object with the catalog.
+
+    Yields:
+        tuple: The row type and the row values.
+    """
+    archivo.seek(0)
+    departamentos = set()
+    clases = set()
+    for fila in csv.DictReader(io.TextIOWrapper(archivo, encoding="utf-8-sig", newline="")):
+        departamento_numero = fila["departamento_numero"].strip()
+        clase_numero = _numero_clase(departamento_numero, fila["clase_numero"].strip())
+        if departamento_numero not in departamentos:
+            departamentos.add(departamento_numero)
+            yield "departamento", {"numero": departamento_numero, "nombre": fila["departamento_nombre"].strip()}
+        if clase_numero not in clases:
+            clases.add(clase_numero)
+            yield "clase", {"numero": clase_numero, "nombre": fila["clase_nombre"].strip(), "departamento_numero": departamento_numero}
+        if fila.get("familia_numero"):
+            yield "familia", {
+                "numero": fila["familia_numero"].strip(),
+                "nombre": fila["familia_nombre"].strip(),
+                "departamento_numero": departamento_numero,
+                "clase_numero": clase_numero,
+            }
+
+def leer_catalogo(archivo, formato: str):
+    """
+    Streams the rows of a catalog file, parents before children.
+
+    Args:
+        archivo: A seekable binary file object with the catalog.
+        formato (str): 'json' or 'csv'.
+
+    Returns:
+        Iterator[tuple]: The row type ('departamento', 'clase' or 'familia') and the row values.
+
+    Raises:
+        ValueError: If the format is not supported.
+    """
+    if formato == "json":
+        return _filas_json(archivo)
+    if formato == "csv":
+        return _filas_csv(archivo)
+    raise ValueError(f"Formato de catálogo no soportado: {formato}")
+
+def _upsert(db: Session, tabla, filas):
+    """
+    Inserts or updates a batch of catalog rows with one executemany.
+
+    Rows whose values did not change are left untouched, so they do not show
+    up in the change log.
+
+    Args:
+        db (Session): The database session.
+        tabla (Table): The catalog table.
+        filas (list): The rows to write.
+    """
+    sentencia = insert(tabla)
+    columnas = [c for c in tabla.columns if not c.primary_key]
+    sentencia = sentencia.on_conflict_do_update(
+        index_elements=list(tabla.primary_key.columns),
+        set_={c.name: sentencia.excluded[c.name] for c in columnas},
+        where=or_(*(c.is_distinct_from(sentencia.excluded[c.name]) for c in columnas)),
+    )
+    db.execute(sentencia, filas)
+
+def importar(db: Session, filas, reemplazar: bool = False, tamano_lote: int = TAMANO_LOTE, confirmar: bool = True):
+    """
+    Merges a stream of catalog rows into the database.
+
+    Existing rows are updated, new rows are inserted and, if `reemplazar` is
+    set, rows missing from the stream are deleted. Everything runs in one
+    transaction.
+
+    Args:
+        db (Session): The database session.
+        filas (Iterable[tuple]): The rows, as returned by `leer_catalogo`.
+        reemplazar (bool): Whether to delete the catalog rows missing from the stream.
+        tamano_lote (int): The number of rows per executemany batch.
+        confirmar (bool): Whether to commit the transaction and invalidate the catalog cache.
+
+    Returns:
+        dict: Per table, the number of rows read, inserted and deleted.
+    """
+    database.iniciar_escritura(db)
+    antes = {tipo: db.execute(select(func.count()).select_from(tabla)).scalar() for tipo, tabla in TABLAS.items()}
+    resumen = {tipo: {"leidos": 0, "insertados": 0, "eliminados": 0} for tipo in TABLAS}
+    pendientes = {tipo: [] for tipo in TABLAS}
+    vistos = {tipo: set() for tipo in TABLAS}
+
+    try:
+        for tipo, fila in filas:
+            resumen[tipo]["leidos"] += 1
+            vistos[tipo].add(fila["numero"])
+            pendientes[tipo].append(fila)
+            if len(pendientes[tipo]) >= tamano_lote:
+                _upsert(db, TABLAS[tipo], pendientes[tipo])
+                pendientes[tipo] = []
+        for tipo, tabla in TABLAS.items():
+            if pendientes[tipo]:
+                _upsert(db, tabla, pendientes[tipo])
+
+        # Children first, so that a replaced catalog never has orphans
+        for tipo in ("familia", "clase", "departamento"):
+            tabla = TABLAS[tipo]
+            if reemplazar:
+                existentes = set(db.execute(select(tabla.c.numero)).scalars())
+                sobrantes = list(existentes - vistos[tipo])
+                for i in range(0, len(sobrantes), tamano_lote):
+                    db.execute(delete(tabla).where(tabla.c.numero.in_(sobrantes[i:i + tamano_lote])))
+                resumen[tipo]["eliminados"] = len(sobrantes)
+            despues = db.execute(select(func.count()).select_from(tabla)).scalar()
+            resumen[tipo]["insertados"] = despues - antes[tipo] + resumen[tipo]["eliminados"]
+
+        if confirmar:
+            db.commit()
+            catalogo.cache.invalidar()
+    except Exception:
+        db.rollback()
+        raise
+    return resumen
+
+def importar_archivo(db: Session, ruta: str, formato: str = None, reemplazar: bool = False, confirmar: bool = True):
+    """
+    Imports a catalog file into the database.
+
+    Args:
+        db (Session): The database session.
+        ruta (str): The path of the catalog file.
+        formato (str): 'json' or 'csv'; by default taken from the file extension.
+        reemplazar (bool): Whether to delete the catalog rows missing from the file.
+        confirmar (bool): Whether to commit the transaction and invalidate the catalog cache.
+
+    Returns:
+        dict: Per table, the number of rows read, inserted and deleted.
+    """
+    formato = formato or ruta.rsplit(".", 1)[-1].lower()
+    with open(ruta, "rb") as archivo:
+        return importar(db, leer_catalogo(archivo, formato), reemplazar=reemplazar, confirmar=confirmar)
+
+def main():
+    import argparse
+    from .database import SessionLocal, init_db
+
+    parser = argparse.ArgumentParser(description="Importa un catálogo de departamentos, clases y familias.")
+    parser.add_argument("ruta", help="Archivo JSON o CSV con el catálogo")
+    parser.add_argument("--formato", choices=["json", "csv"], help="Formato del archivo (por omisión, su extensión)")
+    parser.add_argument("--reemplazar", action="store_true", help="Elimina las entradas que no estén en el archivo")
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    try:
+        print(importar_archivo(db, args.ruta, args.formato, args.reemplazar))
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+This module keeps an in-memory sorted index of every SKU in the database.
+
+It answers existence checks and prefix suggestions with binary searches
+(`bisect`), without touching SQLite. It is loaded at startup and kept current
+by the crud functions that create or delete articles. Writes change the list
+in place, so lookups search it under the same lock.
+"""
+
+import bisect
+import threading
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from . import models
+
+# Above this many SKUs, a batch update rebuilds the list instead of inserting one by one.
+UMBRAL_RECONSTRUCCION = 64
+
+class IndiceSku:
+    """
+    Sorted array of SKUs searched with bisect.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._skus = None
+
+    def cargar(self, db: Session):
+        """
+        Loads every SKU from the database.
+
+        Args:
+            db (Session): The database session.
+        """
+        skus = list(db.execute(select(models.Articulo.sku).order_by(models.Articulo.sku)).scalars())
+        with self._lock:
+            self._skus = skus
+
+    def _consultar(self, db: Session, consulta):
+        """
+        Runs a lookup on the sorted SKU list under the lock, loading it on first use.
+
+        Args:
+            db (Session): The database session, only used if the index is not loaded.
+            consulta (Callable[[list], Any]): The lookup, called with the sorted SKUs.
+
+        Returns:
+            Any: The result of the lookup.
+        """
+        while True:
+            with self._lock:
+                if self._skus is not None:
+                    return consulta(self._skus)
+            self.cargar(db)
+
+    def existe(self, db: Session, sku: str) -> bool:
+        """
+        Checks whether a SKU exists.
+
+        Args:
+            db (Session): The database session, only used if the index is not loaded.
+            sku (str): The SKU to check.
+
+        Returns:
+            bool: True if the SKU exists.
+        """
+        def consulta(skus):
+            i = bisect.bisect_left(skus, sku)
+            return i < len(skus) and skus[i] == sku
+
+        return self._consultar(db, consulta)
+
+    def sugerencias(self, db: Session, prefijo: str, limite: int = 10):
+        """
+        Lists the SKUs starting with a prefix, in order.
+
+        Args:
+            db (Session): The database session, only used if the index is not loaded.
+            prefijo (str): The prefix to look for.
+            limite (int): The maximum number of SKUs to return.
+
+        Returns:
+            List[str]: The matching SKUs.
+        """
+        def consulta(skus):
+            i = bisect.bisect_left(skus, prefijo)
+            resultado = []
+            while i < len(skus) and len(resultado) < limite and skus[i].startswith(prefijo):
+                resultado.append(skus[i])
+                i += 1
+            return resultado
+
+        return self._consultar(db, consulta)
+
+    def agregar(self, skus):
+        """
+        Adds created SKUs to the index.
+
+        Args:
+            skus (Iterable[str]): The created SKUs.
+        """
+        skus = list(skus)
+        with self._lock:
+            if self._skus is None or not skus:
+                return
+            if len(skus) > UMBRAL_RECONSTRUCCION:
+                self._skus = sorted(set(self._skus).union(skus))
+                return
+            for sku in skus:
+                i = bisect.bisect_left(self._skus, sku)
+                if i == len(self._skus) or self._skus[i] != sku:
+                    self._skus.insert(i, sku)
+
+    def quitar(self, skus):
+        """
+        Removes deleted SKUs from the index.
+
+        Args:
+            skus (Iterable[str]): The deleted SKUs.
+        """
+        skus = list(skus)
+        with self._lock:
+            if self._skus is None or not skus:
+                return
+            if len(skus) > UMBRAL_RECONSTRUCCION:
+                quitados = set(skus)
+                self._skus = [sku for sku in self._skus if sku not in quitados]
+                return
+            for sku in skus:
+                i = bisect.bisect_left(self._skus, sku)
+                if i < len(self._skus) and self._skus[i] == sku:
+                    del self._skus[i]
+
+    def invalidar(self):
+        """
+        Discards the index so the next lookup reloads it from the database.
+        """
+        with self._lock:
+            self._skus = None
+
+indice = IndiceSku()
@@ -1,12 +1,22 @@
-from fastapi import FastAPI, HTTPException, Depends
+import itertools
+import json
+import tempfile
+from datetime import date
+from typing import List, Optional
+import anyio
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from . import crud, models, database
+from . import cache_articulos, catalogo, coherencia, crud, models, database, export, importacion, indice_sku, metricas, reportes
 from .database import SessionLocal, engine, init_db
+from .respuestas import RespuestaJSON
 
-# Create all tables in the database
-models.Base.metadata.create_all(bind=engine)
-
-app = FastAPI()
+app = FastAPI(default_response_class=RespuestaJSON)
+app.add_middleware(metricas.MiddlewareMetricas)
+metricas.instrumentar_sql(engine)
+if database.async_engine is not None:
+    metricas.instrumentar_sql(database.async_engine.sync_engine)
 
 def get_db():
     """
@@ -25,13 +35,80 @@ def get_db():
 def startup_event():
     """
     Initializes the database and loads initial data when the application starts.
+
+    Pending schema migrations are applied and the catalog is loaded only if it
+    is missing or `datos.json` has changed, so restarting never loses data.
+    The change log is pruned here too, even if polling is disabled.
+    With several workers this runs under a file lock, one worker at a time,
+    and each worker then follows the writes of the others (see `coherencia`).
+    The change log is followed in every process, since the number of workers
+    started by `uvicorn --workers` is not visible from inside a worker.
     """
-    init_db()
+    with database.bloqueo_arranque():
+        init_db()
+        db = SessionLocal()
+        try:
+            crud.sincronizar_catalogo(db)
+        finally:
+            db.close()
+        export.podar_cambios()
+    # Record the position of the change log before loading the caches, so no write is missed
+    coherencia.sincronizador.iniciar()
     db = SessionLocal()
-    crud.cargar_datos(db)
+    catalogo.cache.obtener(db)
+    indice_sku.indice.cargar(db)
     db.close()
 
-@app.post("/articulos/")
+@app.on_event("shutdown")
+def shutdown_event():
+    """
+    Stops following the writes of the other workers.
+    """
+    coherencia.sincronizador.detener()
+
+@app.get("/articulos/buscar")
+def buscar_articulos(q: str, limite: int = Query(20, ge=1, le=100), db: Session = Depends(get_db)):
+    """
+    Searches articles by name, brand and model, matching word prefixes.
+
+    Args:
+        q (str): The words to search for.
+        limite (int): The maximum number of results.
+        db (Session): The database session.
+
+    Returns:
+        list: The matching articles, most relevant first.
+    """
+    return crud.buscar_articulos(db, q, limite)
+
+@app.get("/articulos/sku-sugerencias")
+def sugerir_skus(prefix: str = "", limite: int = Query(10, ge=1, le=100), db: Session = Depends(get_db)):
+    """
+    Suggests existing SKUs starting with a prefix, from the in-memory SKU index.
+
+    Args:
+        prefix (str): The start of the SKU typed so far.
+        limite (int): The maximum number of suggestions.
+        db (Session): The database session, only used if the index is not loaded.
+
+    Returns:
+        dict: Whether the prefix is itself an existing SKU, and the matching SKUs.
+    """
+    return {
+        "prefix": prefix,
+        "existe": indice_sku.indice.existe(db, prefix) if prefix else False,
+        "sugerencias": indice_sku.indice.sugerencias(db, prefix, limite),
+    }
+
+# In async mode the per-SKU article endpoints are served by `rutas_async`. Its
+# routes are mounted here, ahead of the sync ones below, so they take precedence;
+# any fixed `/articulos/<name>` GET/PUT/DELETE route must be declared above this line.
+if database.DB_MODO == "async":
+    from . import rutas_async
+
+    app.include_router(rutas_async.router)
+
+@app.post("/articulos/", response_model=models.ArticuloInDB)
 def crear_articulo(articulo: models.ArticuloCreate, db: Session = Depends(get_db)):
     """
     Creates a new article.
@@ -51,27 +128,317 @@ def crear_articulo(articulo: models.ArticuloCreate, db: Session = Depends(get_db
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.get("/articulos/{sku}")
-def obtener_articulo(sku: str, db: Session = Depends(get_db)):
+def _bloques_cuerpo(request: Request):
+    """
+    Iterates over the chunks of a request body from a worker thread.
+
+    Each chunk is awaited on the event loop as it arrives, so the body is
+    never held in memory as a whole.
+
+    Args:
+        request (Request): The incoming request.
+
+    Yields:
+        bytes: The chunks of the body.
+    """
+    flujo = request.stream().__aiter__()
+
+    async def siguiente():
+        try:
+            return await flujo.__anext__()
+        except StopAsyncIteration:
+            return None
+
+    while (bloque := anyio.from_thread.run(siguiente)) is not None:
+        if bloque:
+            yield bloque
+
+def _filas_ndjson(bloques):
+    """
+    Lazily parses an NDJSON payload, one article per line.
+
+    Lines that are not valid JSON are yielded as `None` so the bulk loader
+    reports them as rejected rows instead of failing the whole request.
+
+    Args:
+        bloques (Iterable[bytes]): The chunks of the request body.
+
+    Yields:
+        dict: The parsed article rows.
+    """
+    pendiente = b""
+    for bloque in itertools.chain(bloques, [b"\n"]):
+        *lineas, pendiente = (pendiente + bloque).split(b"\n")
+        for linea in lineas:
+            linea = linea.strip()
+            if not linea:
+                continue
+            try:
+                yield json.loads(linea)
+            except ValueError:
+                yield None
+
+def _filas_arreglo(bloques):
+    """
+    Lazily parses a JSON array of articles, incrementally if `ijson` is installed.
+
+    Args:
+        bloques (Iterable[bytes]): The chunks of the request body.
+
+    Yields:
+        dict: The parsed article rows; if the array breaks after some rows,
+        a final `None`, reported by the bulk loader as a rejected row.
+
+    Raises:
+        ValueError: If the body is not a JSON array (before any row is read).
+    """
+    if importacion.ijson is None:
+        try:
+            yield from json.loads(b"".join(bloques))
+        except ValueError:
+            raise ValueError("El cuerpo no es un arreglo JSON válido")
+        return
+    filas = importacion.ijson.sendable_list()
+    parser = importacion.ijson.items_coro(filas, "item", use_float=True)
+    leidas = 0
+    try:
+        for bloque in bloques:
+            parser.send(bloque)
+            leidas += len(filas)
+            yield from filas
+            del filas[:]
+        parser.close()
+        yield from filas
+    except importacion.ijson.JSONError:
+        if not leidas and not filas:
+            raise ValueError("El cuerpo no es un arreglo JSON válido")
+        yield from filas
+        yield None
+
+def _filas_cuerpo(bloques, ndjson: bool):
+    """
+    Parses the body of a bulk request as NDJSON or as a JSON array.
+
+    The body is NDJSON if the content type says so or if it does not start with '['.
+
+    Args:
+        bloques (Iterable[bytes]): The chunks of the request body.
+        ndjson (bool): Whether the content type is NDJSON.
+
+    Returns:
+        Iterator[dict]: The parsed article rows.
+    """
+    bloques = iter(bloques)
+    inicio = b""
+    for bloque in bloques:
+        inicio += bloque
+        if inicio.strip():
+            break
+    bloques = itertools.chain([inicio], bloques)
+    if ndjson or not inicio.lstrip().startswith(b"["):
+        return _filas_ndjson(bloques)
+    return _filas_arreglo(bloques)
+
+@app.post("/articulos/bulk")
+async def crear_articulos_bulk(request: Request, db: Session = Depends(get_db)):
+    """
+    Creates many articles at once.
+
+    The body can be a JSON array of articles or an NDJSON stream
+    (`application/x-ndjson`) with one article per line. It is parsed while it
+    is received, so rows are validated and written chunk by chunk without
+    reading the whole body first.
+
+    Args:
+        request (Request): The incoming request with the article rows.
+        db (Session): The database session.
+
+    Returns:
+        dict: The number of inserted and rejected rows and the per-row errors.
+
+    Raises:
+        HTTPException: If the body is not a JSON array nor NDJSON.
+    """
+    ndjson = "ndjson" in request.headers.get("content-type", "")
+
+    def cargar():
+        return crud.crear_articulos_bulk(db, _filas_cuerpo(_bloques_cuerpo(request), ndjson))
+
+    try:
+        return await run_in_threadpool(cargar)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/articulos/stock/ajustes")
+def ajustar_stock(ajustes: List[models.AjusteStock], db: Session = Depends(get_db)):
+    """
+    Applies a batch of relative stock adjustments atomically.
+
+    Args:
+        ajustes (List[models.AjusteStock]): The adjustments to apply.
+        db (Session): The database session.
+
+    Returns:
+        dict: The number of updated articles and the rejected adjustments.
+
+    Raises:
+        HTTPException: If the batch conflicted with another writer and was not applied.
+    """
+    try:
+        return crud.ajustar_stock(db, ajustes)
+    except crud.ConflictoConcurrencia as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@app.post("/articulos/bulk-delete")
+def eliminar_articulos(seleccion: models.SeleccionArticulos, db: Session = Depends(get_db)):
+    """
+    Deletes many articles, selected by SKU list and/or department, class and family.
+
+    Args:
+        seleccion (models.SeleccionArticulos): The articles to delete.
+        db (Session): The database session.
+
+    Returns:
+        dict: The number of deleted articles.
+
+    Raises:
+        HTTPException: If no selection criterion was given.
+    """
+    try:
+        return {"afectados": crud.eliminar_articulos(db, seleccion)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/articulos/bulk-descontinuar")
+def descontinuar_articulos(seleccion: models.SeleccionArticulos, db: Session = Depends(get_db)):
+    """
+    Discontinues many articles, selected by SKU list and/or department, class and family.
+
+    Args:
+        seleccion (models.SeleccionArticulos): The articles to discontinue.
+        db (Session): The database session.
+
+    Returns:
+        dict: The number of discontinued articles.
+
+    Raises:
+        HTTPException: If no selection criterion was given.
+    """
+    try:
+        return {"afectados": crud.descontinuar_articulos(db, seleccion)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/articulos/lookup")
+def consultar_articulos(consulta: models.ConsultaSkus, db: Session = Depends(get_db)):
+    """
+    Retrieves many articles by SKU in one request.
+
+    Args:
+        consulta (models.ConsultaSkus): The SKUs to retrieve.
+        db (Session): The database session.
+
+    Returns:
+        dict: The found articles and the SKUs that do not exist.
+
+    Raises:
+        HTTPException: If too many SKUs were requested.
+    """
+    try:
+        articulos, faltantes = crud.obtener_articulos(db, consulta.skus)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return RespuestaJSON({"articulos": articulos, "faltantes": faltantes})
+
+@app.get("/articulos/")
+def listar_articulos(
+    departamento_numero: Optional[str] = None,
+    clase_numero: Optional[str] = None,
+    familia_numero: Optional[str] = None,
+    marca: Optional[str] = None,
+    descontinuado: Optional[int] = None,
+    fecha_alta_desde: Optional[date] = None,
+    fecha_alta_hasta: Optional[date] = None,
+    fecha_baja_desde: Optional[date] = None,
+    fecha_baja_hasta: Optional[date] = None,
+    despues_de: Optional[str] = None,
+    limite: int = Query(100, ge=1, le=1000),
+    fields: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Lists articles, filtered and paginated by SKU.
+
+    To get the next page pass the returned `siguiente` SKU as `despues_de`.
+
+    Args:
+        departamento_numero (str): Only articles of this department.
+        clase_numero (str): Only articles of this class.
+        familia_numero (str): Only articles of this family.
+        marca (str): Only articles of this brand.
+        descontinuado (int): Only discontinued (1) or active (0) articles.
+        fecha_alta_desde (date): Only articles created on or after this date.
+        fecha_alta_hasta (date): Only articles created on or before this date.
+        fecha_baja_desde (date): Only articles discontinued on or after this date.
+        fecha_baja_hasta (date): Only articles discontinued on or before this date.
+        despues_de (str): The last SKU of the previous page.
+        limite (int): The maximum number of articles per page.
+        fields (str): Comma-separated columns to return (e.g. 'sku,stock'); all by default.
+        db (Session): The database session.
+
+    Returns:
+        dict: The articles of the page and the cursor of the next page.
+
+    Raises:
+        HTTPException: If a requested field does not exist.
+    """
+    try:
+        campos = crud.parsear_campos(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    filtros = {
+        "departamento_numero": departamento_numero,
+        "clase_numero": clase_numero,
+        "familia_numero": familia_numero,
+        "marca": marca,
+        "descontinuado": descontinuado,
+        "fecha_alta_desde": fecha_alta_desde,
+        "fecha_alta_hasta": fecha_alta_hasta,
+        "fecha_baja_desde": fecha_baja_desde,
+        "fecha_baja_hasta": fecha_baja_hasta,
+    }
+    articulos, siguiente = crud.listar_articulos(db, filtros, despues_de, limite, campos)
+    return RespuestaJSON({"articulos": articulos, "siguiente": siguiente})
+
+@app.get("/articulos/{sku}", response_model=models.ArticuloInDB)
+def obtener_articulo(sku: str, fields: Optional[str] = None, db: Session = Depends(get_db)):
     """
     Retrieves an article by its SKU.
 
     Args:
         sku (str): The SKU of the article to retrieve.
+        fields (str): Comma-separated columns to return (e.g. 'sku,stock'); all by default.
         db (Session): The database session.
 
     Returns:
         dict: The article data.
 
     Raises:
-        HTTPException: If the article is not found.
+        HTTPException: If a requested field does not exist or the article is not found.
     """
-    articulo = crud.obtener_articulo(db, sku)
+    try:
+        campos = crud.parsear_campos(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    articulo = crud.obtener_articulo(db, sku, campos)
     if articulo is None:
         raise HTTPException(status_code=404, detail="Artículo no encontrado")
+    if campos:
+        # A projection does not match the response model, send it as is
+        return RespuestaJSON(articulo)
     return articulo
 
-@app.put("/articulos/{sku}")
+@app.put("/articulos/{sku}", response_model=Optional[models.ArticuloInDB])
 def actualizar_articulo(sku: str, articulo: models.ArticuloUpdate, db: Session = Depends(get_db)):
     """
     Updates an existing article.
@@ -86,7 +453,7 @@ def actualizar_articulo(sku: str, articulo: models.ArticuloUpdate, db: Session =
     """
     return crud.actualizar_articulo(db, sku, articulo)
 
-@app.delete("/articulos/{sku}")
+@app.delete("/articulos/{sku}", response_model=Optional[models.ArticuloInDB])
 def eliminar_articulo(sku: str, db: Session = Depends(get_db)):
     """
     Deletes an article.
@@ -100,27 +467,92 @@ def eliminar_articulo(sku: str, db: Session = Depends(get_db)):
     """
     return crud.eliminar_articulo(db, sku)
 
+def _respuesta_catalogo(request: Request, contenido: bytes, etag: str):
+    """
+    Builds a JSON response for a piece of the cached catalog.
+
+    Args:
+        request (Request): The incoming request, checked for `If-None-Match`.
+        contenido (bytes): The serialized JSON body.
+        etag (str): The entity tag of the current catalog.
+
+    Returns:
+        Response: The JSON body, or an empty 304 response if the client copy is current.
+    """
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(content=contenido, media_type="application/json", headers=headers)
+
+@app.get("/catalogo")
+def obtener_catalogo(request: Request, db: Session = Depends(get_db)):
+    """
+    Retrieves the whole department -> class -> family tree in one payload.
+
+    Args:
+        request (Request): The incoming request.
+        db (Session): The database session, only used if the catalog cache is cold.
+
+    Returns:
+        list: The departments, each with its classes and their families.
+    """
+    cache = catalogo.cache.obtener(db)
+    return _respuesta_catalogo(request, cache.arbol, cache.etag)
+
+@app.post("/catalogo/importar")
+async def importar_catalogo(request: Request, formato: Optional[str] = None, reemplazar: bool = False, db: Session = Depends(get_db)):
+    """
+    Imports a catalog file sent as the request body.
+
+    The body is spooled to a temporary file and parsed incrementally, then
+    merged into the catalog with bulk upserts (see `importacion`).
+
+    Args:
+        request (Request): The incoming request with the catalog file.
+        formato (str): 'json' or 'csv'; by default taken from the content type.
+        reemplazar (bool): Whether to delete the catalog entries missing from the file.
+        db (Session): The database session.
+
+    Returns:
+        dict: Per table, the number of rows read, inserted and deleted.
+
+    Raises:
+        HTTPException: If the file cannot be parsed.
+    """
+    formato = formato or ("csv" if "csv" in request.headers.get("content-type", "") else "json")
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as archivo:
+        async for bloque in request.stream():
+            archivo.write(bloque)
+        try:
+            filas = importacion.leer_catalogo(archivo, formato)
+            return await run_in_threadpool(importacion.importar, db, filas, reemplazar)
+        except (ValueError, KeyError) as e:
+            raise HTTPException(status_code=400, detail=f"Catálogo inválido: {e}")
+
 @app.get("/departamentos/")
-def obtener_departamentos(db: Session = Depends(get_db)):
+def obtener_departamentos(request: Request, db: Session = Depends(get_db)):
     """
     Retrieves all departments.
 
     Args:
-        db (Session): The database session.
+        request (Request): The incoming request.
+        db (Session): The database session, only used if the catalog cache is cold.
 
     Returns:
         list: A list of all departments.
     """
-    return crud.obtener_departamentos(db)
+    cache = catalogo.cache.obtener(db)
+    return _respuesta_catalogo(request, cache.departamentos, cache.etag)
 
 @app.get("/clases/{departamento_numero}")
-def obtener_clases(departamento_numero: str, db: Session = Depends(get_db)):
+def obtener_clases(departamento_numero: str, request: Request, db: Session = Depends(get_db)):
     """
     Retrieves all classes for a given department.
 
     Args:
         departamento_numero (str): The department number.
-        db (Session): The database session.
+        request (Request): The incoming request.
+        db (Session): The database session, only used if the catalog cache is cold.
 
     Returns:
         list: A list of classes for the given department.
@@ -128,22 +560,189 @@ def obtener_clases(departamento_numero: str, db: Session = Depends(get_db)):
     Raises:
         HTTPException: If no classes are found for the department.
     """
-    clases = crud.obtener_clases(db, departamento_numero)
+    cache = catalogo.cache.obtener(db)
+    clases = cache.clases.get(departamento_numero)
     if not clases:
         raise HTTPException(status_code=404, detail=f"No se encontraron clases para el departamento {departamento_numero}")
-    return clases
+    return _respuesta_catalogo(request, clases, cache.etag)
 
 @app.get("/familias/{departamento_numero}/{clase_numero}")
-def obtener_familias(departamento_numero: str, clase_numero: str, db: Session = Depends(get_db)):
+def obtener_familias(departamento_numero: str, clase_numero: str, request: Request, db: Session = Depends(get_db)):
     """
     Retrieves all families for a given department and class.
 
     Args:
         departamento_numero (str): The department number.
         clase_numero (str): The class number.
-        db (Session): The database session.
+        request (Request): The incoming request.
+        db (Session): The database session, only used if the catalog cache is cold.
 
     Returns:
         list: A list of families for the given department and class.
     """
-    return crud.obtener_familias(db, departamento_numero, clase_numero)
\ No newline at end of file
+    cache = catalogo.cache.obtener(db)
+    familias = cache.familias.get((departamento_numero, clase_numero), b"[]")
+    return _respuesta_catalogo(request, familias, cache.etag)
+
+@app.get("/reportes/inventario")
+def reporte_inventario(nivel: str = "familia", db: Session = Depends(get_db)):
+    """
+    Retrieves inventory totals grouped by department, class or family.
+
+    Args:
+        nivel (str): The grouping level: 'departamento', 'clase', 'familia' or 'total'.
+        db (Session): The database session.
+
+    Returns:
+        list: One row per group with the number of SKUs, discontinued SKUs, stock and quantity.
+
+    Raises:
+        HTTPException: If the level is not valid.
+    """
+    if nivel not in reportes.NIVELES:
+        raise HTTPException(status_code=400, detail=f"Nivel inválido, use uno de: {', '.join(reportes.NIVELES)}")
+    return reportes.cache.obtener(db, nivel)
+
+@app.get("/reportes/inventario/total")
+def reporte_inventario_total(db: Session = Depends(get_db)):
+    """
+    Retrieves the inventory totals of the whole catalog.
+
+    Args:
+        db (Session): The database session.
+
+    Returns:
+        dict: The number of SKUs, discontinued SKUs, stock and quantity.
+    """
+    return reportes.cache.obtener(db, "total")[0]
+
+@app.get("/cache/articulos")
+def estadisticas_cache_articulos():
+    """
+    Reports the size and hit/miss statistics of the article cache.
+
+    Returns:
+        dict: The number of entries, hits (positive and negative), misses and evictions.
+    """
+    return cache_articulos.cache.estadisticas()
+
+@app.get("/export/")
+def listar_tablas_exportables():
+    """
+    Lists the tables that can be exported.
+
+    Returns:
+        list: The names of the exportable tables.
+    """
+    return export.tablas_exportables()
+
+@app.get("/export/{tabla}.csv")
+def exportar_csv(tabla: str, gzip: bool = False, incremental: bool = False):
+    """
+    Streams a table as a CSV file.
+
+    In incremental mode only the rows inserted, updated or deleted since the
+    previous incremental export are streamed, with a leading `operacion`
+    column, and a table without changes is answered with 204 No Content.
+
+    Args:
+        tabla (str): The name of the table to export.
+        gzip (bool): Whether to compress the file with gzip.
+        incremental (bool): Whether to export only the changes since the last incremental export.
+
+    Returns:
+        StreamingResponse: The CSV file, streamed in chunks.
+
+    Raises:
+        HTTPException: If the table does not exist.
+    """
+    tabla_db = export.obtener_tabla(tabla)
+    if tabla_db is None:
+        raise HTTPException(status_code=404, detail=f"La tabla {tabla} no existe")
+    if incremental:
+        rango = export.preparar_delta(tabla_db)
+        if rango is None:
+            return Response(status_code=204)
+        contenido = export.filas_csv_delta(tabla_db, *rango)
+    else:
+        contenido = export.filas_csv(tabla_db)
+    nombre = f"{tabla}.csv"
+    media_type = "text/csv"
+    if gzip:
+        contenido = export.comprimir_gzip(contenido)
+        nombre += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        contenido,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{nombre}"'},
+    )
+
+def _exportar_arrow(tabla: str, formato: str, incremental: bool):
+    """
+    Streams a table in one of the pyarrow formats.
+
+    Args:
+        tabla (str): The name of the table to export.
+        formato (str): 'parquet' or 'arrow'.
+        incremental (bool): Whether to export only the changes since the last incremental export.
+
+    Returns:
+        Response: The file streamed in row groups, or 204 No Content if an incremental export has no changes.
+
+    Raises:
+        HTTPException: If the table does not exist or pyarrow is not installed.
+    """
+    if export.pyarrow is None:
+        raise HTTPException(status_code=501, detail="La exportación a Parquet/Arrow requiere el paquete pyarrow")
+    tabla_db = export.obtener_tabla(tabla)
+    if tabla_db is None:
+        raise HTTPException(status_code=404, detail=f"La tabla {tabla} no existe")
+    rango = None
+    if incremental:
+        rango = export.preparar_delta(tabla_db)
+        if rango is None:
+            return Response(status_code=204)
+    return StreamingResponse(
+        export.filas_arrow(tabla_db, formato, rango),
+        media_type=export.FORMATOS_ARROW[formato],
+        headers={"Content-Disposition": f'attachment; filename="{tabla}.{formato}"'},
+    )
+
+@app.get("/export/{tabla}.parquet")
+def exportar_parquet(tabla: str, incremental: bool = False):
+    """
+    Streams a table as a Parquet file with a schema taken from the model column types.
+
+    Args:
+        tabla (str): The name of the table to export.
+        incremental (bool): Whether to export only the changes since the last incremental export.
+
+    Returns:
+        StreamingResponse: The Parquet file, one row group per chunk of rows.
+    """
+    return _exportar_arrow(tabla, "parquet", incremental)
+
+@app.get("/export/{tabla}.arrow")
+def exportar_arrow(tabla: str, incremental: bool = False):
+    """
+    Streams a table as an Arrow IPC file with a schema taken from the model column types.
+
+    Args:
+        tabla (str): The name of the table to export.
+        incremental (bool): Whether to export only the changes since the last incremental export.
+
+    Returns:
+        StreamingResponse: The Arrow IPC file, one record batch per chunk of rows.
+    """
+    return _exportar_arrow(tabla, "arrow", incremental)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def obtener_metricas():
+    """
+    Exposes the request and SQL metrics of this process in the Prometheus text format.
+
+    Returns:
+        PlainTextResponse: The metrics.
+    """
+    return PlainTextResponse(metricas.registro.texto_prometheus(), media_type="text/plain; version=0.0.4")
\ No newline at end of file
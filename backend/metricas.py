@@ -0,0 +1,204 @@
+"""
+This module collects in-process metrics of the API and exposes them in the Prometheus text format.
+
+`MiddlewareMetricas` records per-route latency histograms, response status
+counts and the number of requests in flight. `instrumentar_sql` hooks the
+SQLAlchemy cursor events of an engine to time every statement, count the
+statements run by each request and log the slow ones. Everything is kept in
+memory, so no external collector is needed: `GET /metrics` renders it.
+
+Configuration is read from the environment:
+    ABCC_SQL_LENTA_MS: Statements slower than this are logged as warnings (default 100).
+"""
+
+import contextvars
+import logging
+import os
+import threading
+import time
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+UMBRAL_LENTA = float(os.environ.get("ABCC_SQL_LENTA_MS", "100")) / 1000
+
+# Upper bounds, in seconds, of the latency histogram buckets.
+BUCKETS_SEGUNDOS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Upper bounds of the statements-per-request histogram buckets.
+BUCKETS_CONSULTAS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+
+# Statement counter of the request being served; a mutable list so that
+# threadpool workers, which run in a copy of the context, update the same one.
+_consultas_peticion = contextvars.ContextVar("consultas_peticion", default=None)
+
+class Histograma:
+    """
+    Cumulative histogram with fixed buckets, as exported by Prometheus.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.conteos = [0] * len(buckets)
+        self.suma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        for i, limite in enumerate(self.buckets):
+            if valor <= limite:
+                self.conteos[i] += 1
+                break
+        self.suma += valor
+        self.total += 1
+
+    def lineas(self, nombre, etiquetas):
+        acumulado = 0
+        for limite, conteo in zip(self.buckets, self.conteos):
+            acumulado += conteo
+            yield f"{nombre}_bucket{_etiquetas({**etiquetas, 'le': limite})} {acumulado}"
+        yield f"{nombre}_bucket{_etiquetas({**etiquetas, 'le': '+Inf'})} {self.total}"
+        yield f"{nombre}_sum{_etiquetas(etiquetas)} {self.suma}"
+        yield f"{nombre}_count{_etiquetas(etiquetas)} {self.total}"
+
+def _etiquetas(etiquetas):
+    if not etiquetas:
+        return ""
+    pares = []
+    for clave, valor in etiquetas.items():
+        valor = str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pares.append(f'{clave}="{valor}"')
+    return "{" + ",".join(pares) + "}"
+
+class Registro:
+    """
+    Thread-safe store of every metric of the process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencias = {}
+        self.estados = {}
+        self.en_curso = 0
+        self.consultas_por_peticion = {}
+        self.consultas = {}
+        self.consultas_lentas = 0
+
+    def iniciar_peticion(self):
+        with self._lock:
+            self.en_curso += 1
+
+    def terminar_peticion(self, metodo, ruta, estado, duracion, consultas):
+        with self._lock:
+            self.en_curso -= 1
+            clave = (metodo, ruta)
+            self.latencias.setdefault(clave, Histograma(BUCKETS_SEGUNDOS)).observar(duracion)
+            self.consultas_por_peticion.setdefault(clave, Histograma(BUCKETS_CONSULTAS)).observar(consultas)
+            self.estados[clave + (estado,)] = self.estados.get(clave + (estado,), 0) + 1
+
+    def registrar_consulta(self, operacion, duracion):
+        with self._lock:
+            self.consultas.setdefault(operacion, Histograma(BUCKETS_SEGUNDOS)).observar(duracion)
+            if duracion >= UMBRAL_LENTA:
+                self.consultas_lentas += 1
+
+    def texto_prometheus(self) -> str:
+        """
+        Renders every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: The metrics.
+        """
+        lineas = []
+
+        def familia(nombre, tipo, ayuda):
+            lineas.append(f"# HELP {nombre} {ayuda}")
+            lineas.append(f"# TYPE {nombre} {tipo}")
+
+        with self._lock:
+            familia("abcc_http_requests_in_progress", "gauge", "Requests being served.")
+            lineas.append(f"abcc_http_requests_in_progress {self.en_curso}")
+            familia("abcc_http_requests_total", "counter", "Requests served by route and status code.")
+            for (metodo, ruta, estado), conteo in sorted(self.estados.items()):
+                lineas.append(f"abcc_http_requests_total{_etiquetas({'method': metodo, 'route': ruta, 'status': estado})} {conteo}")
+            familia("abcc_http_request_duration_seconds", "histogram", "Request latency by route.")
+            for (metodo, ruta), histograma in sorted(self.latencias.items()):
+                lineas.extend(histograma.lineas("abcc_http_request_duration_seconds", {"method": metodo, "route": ruta}))
+            familia("abcc_http_request_queries", "histogram", "SQL statements run per request by route.")
+            for (metodo, ruta), histograma in sorted(self.consultas_por_peticion.items()):
+                lineas.extend(histograma.lineas("abcc_http_request_queries", {"method": metodo, "route": ruta}))
+            familia("abcc_sql_query_duration_seconds", "histogram", "SQL statement latency by operation.")
+            for operacion, histograma in sorted(self.consultas.items()):
+                lineas.extend(histograma.lineas("abcc_sql_query_duration_seconds", {"operation": operacion}))
+            familia("abcc_sql_slow_queries_total", "counter", "SQL statements slower than ABCC_SQL_LENTA_MS.")
+            lineas.append(f"abcc_sql_slow_queries_total {self.consultas_lentas}")
+        return "\n".join(lineas) + "\n"
+
+registro = Registro()
+
+class MiddlewareMetricas:
+    """
+    ASGI middleware that measures every HTTP request.
+
+    The latency covers the whole response, including streamed bodies, and is
+    recorded under the route template (e.g. '/articulos/{sku}') so that the
+    number of series does not grow with the requested paths.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        estado = 500
+        consultas = [0]
+        token = _consultas_peticion.set(consultas)
+
+        async def enviar(mensaje):
+            nonlocal estado
+            if mensaje["type"] == "http.response.start":
+                estado = mensaje["status"]
+            await send(mensaje)
+
+        registro.iniciar_peticion()
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            duracion = time.perf_counter() - inicio
+            _consultas_peticion.reset(token)
+            ruta = scope.get("route")
+            ruta = getattr(ruta, "path", None) or "sin_ruta"
+            registro.terminar_peticion(scope["method"], ruta, estado, duracion, consultas[0])
+
+def instrumentar_sql(engine):
+    """
+    Times every SQL statement executed through an engine.
+
+    The start time is kept on the execution context of the statement, since
+    `after_cursor_execute` does not fire for statements that fail and a start
+    time left behind on the connection would be paired with a later statement.
+
+    Args:
+        engine (Engine): The engine to instrument (for an async engine, its `sync_engine`).
+    """
+    @event.listens_for(engine, "before_cursor_execute")
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._metricas_inicio = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _despues(conn, cursor, statement, parameters, context, executemany):
+        inicio = getattr(context, "_metricas_inicio", None)
+        if inicio is None:
+            return
+        duracion = time.perf_counter() - inicio
+        operacion = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTRA"
+        registro.registrar_consulta(operacion, duracion)
+        consultas = _consultas_peticion.get()
+        if consultas is not None:
+            consultas[0] += 1
+        if duracion >= UMBRAL_LENTA:
+            logger.warning("Consulta lenta (%.1f ms): %s", duracion * 1000, " ".join(statement.split())[:500])
@@ -0,0 +1,186 @@
+"""
+Migraciones versionadas e idempotentes del esquema de la base de datos.
+
+Cada migración se aplica una sola vez y queda registrada en la tabla
+'version_esquema'. Todas usan sentencias con IF NOT EXISTS / checkfirst, de
+modo que repetir una migración (por ejemplo, si dos procesos arrancan a la
+vez) no tiene efecto.
+"""
+
+from datetime import datetime
+from sqlalchemy import func, inspect, select, text
+from sqlalchemy.dialects.sqlite import insert
+from . import models
+from .database import OPCION_ESCRITURA, Base
+
+def _crear_triggers_cambios(conn):
+    """
+    Crea los triggers que registran en 'cambios' las escrituras de las tablas rastreadas.
+    """
+    for tabla, clave in models.TABLAS_RASTREADAS.items():
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {tabla}_cambios_insert AFTER INSERT ON {tabla} BEGIN "
+            f"INSERT INTO cambios (tabla, clave, operacion) VALUES ('{tabla}', NEW.{clave}, 'I'); END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {tabla}_cambios_update AFTER UPDATE ON {tabla} BEGIN "
+            f"INSERT INTO cambios (tabla, clave, operacion) SELECT '{tabla}', OLD.{clave}, 'D' WHERE OLD.{clave} <> NEW.{clave}; "
+            f"INSERT INTO cambios (tabla, clave, operacion) VALUES ('{tabla}', NEW.{clave}, 'U'); END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {tabla}_cambios_delete AFTER DELETE ON {tabla} BEGIN "
+            f"INSERT INTO cambios (tabla, clave, operacion) VALUES ('{tabla}', OLD.{clave}, 'D'); END"
+        ))
+
+def _v1_esquema_base(conn):
+    """
+    Crea las tablas que falten, los índices de 'articulos' (también sobre bases
+    creadas antes de que existieran) y los triggers de la bitácora de cambios.
+    """
+    Base.metadata.create_all(bind=conn, checkfirst=True)
+    for indice in models.Articulo.__table__.indexes:
+        indice.create(bind=conn, checkfirst=True)
+    _crear_triggers_cambios(conn)
+
+def _v2_busqueda_texto(conn):
+    """
+    Crea el índice de texto completo FTS5 'articulos_fts' sobre articulo, marca
+    y modelo, los triggers que lo mantienen sincronizado y lo llena con los
+    artículos existentes.
+
+    La llave primaria de 'articulos' es de texto, y VACUUM puede renumerar su
+    rowid implícito, así que el índice no usa ese rowid como clave: cada SKU
+    recibe un id en 'articulos_fts_claves' (INTEGER PRIMARY KEY, que VACUUM
+    conserva) y el índice guarda su propia copia de articulo, marca y modelo
+    con ese id.
+    """
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS articulos_fts_claves ("
+        "id INTEGER PRIMARY KEY, sku VARCHAR(6) NOT NULL UNIQUE)"
+    ))
+    conn.execute(text(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS articulos_fts USING fts5("
+        "articulo, marca, modelo, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    ))
+    quitar = (
+        "DELETE FROM articulos_fts WHERE rowid = (SELECT id FROM articulos_fts_claves WHERE sku = OLD.sku); "
+    )
+    agregar = (
+        "INSERT INTO articulos_fts (rowid, articulo, marca, modelo) "
+        "SELECT id, NEW.articulo, NEW.marca, NEW.modelo FROM articulos_fts_claves WHERE sku = NEW.sku; "
+    )
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS articulos_fts_insert AFTER INSERT ON articulos BEGIN "
+        f"INSERT OR IGNORE INTO articulos_fts_claves (sku) VALUES (NEW.sku); {agregar}END"
+    ))
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS articulos_fts_delete AFTER DELETE ON articulos BEGIN "
+        f"{quitar}DELETE FROM articulos_fts_claves WHERE sku = OLD.sku; END"
+    ))
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS articulos_fts_update AFTER UPDATE OF sku, articulo, marca, modelo ON articulos BEGIN "
+        f"{quitar}UPDATE articulos_fts_claves SET sku = NEW.sku WHERE sku = OLD.sku; {agregar}END"
+    ))
+    conn.execute(text("DELETE FROM articulos_fts"))
+    conn.execute(text("DELETE FROM articulos_fts_claves"))
+    conn.execute(text("INSERT INTO articulos_fts_claves (sku) SELECT sku FROM articulos ORDER BY sku"))
+    conn.execute(text(
+        "INSERT INTO articulos_fts (rowid, articulo, marca, modelo) "
+        "SELECT claves.id, articulos.articulo, articulos.marca, articulos.modelo "
+        "FROM articulos JOIN articulos_fts_claves AS claves ON claves.sku = articulos.sku"
+    ))
+
+def _sumar_resumen(fila, signo):
+    """
+    Genera la sentencia que suma (signo '+') o resta (signo '-') un artículo
+    ('NEW' u 'OLD') a los totales de su familia en 'resumen_inventario'.
+    """
+    clave = (
+        f"COALESCE({fila}.departamento_numero, ''), COALESCE({fila}.clase_numero, ''), "
+        f"COALESCE({fila}.familia_numero, '')"
+    )
+    valores = (
+        f"{signo}1, {signo}COALESCE({fila}.descontinuado, 0), "
+        f"{signo}COALESCE({fila}.stock, 0), {signo}COALESCE({fila}.cantidad, 0)"
+    )
+    return (
+        "INSERT INTO resumen_inventario (departamento_numero, clase_numero, familia_numero, "
+        f"skus, descontinuados, stock, cantidad) VALUES ({clave}, {valores}) "
+        "ON CONFLICT (departamento_numero, clase_numero, familia_numero) DO UPDATE SET "
+        "skus = skus + excluded.skus, descontinuados = descontinuados + excluded.descontinuados, "
+        "stock = stock + excluded.stock, cantidad = cantidad + excluded.cantidad; "
+        "DELETE FROM resumen_inventario WHERE skus = 0 AND "
+        f"(departamento_numero, clase_numero, familia_numero) = ({clave}); "
+    )
+
+def _v3_resumen_inventario(conn):
+    """
+    Crea la tabla 'resumen_inventario', los triggers que la mantienen al día
+    con cada escritura de 'articulos' y la llena con los artículos existentes.
+    """
+    models.ResumenInventario.__table__.create(bind=conn, checkfirst=True)
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS articulos_resumen_insert AFTER INSERT ON articulos BEGIN "
+        f"{_sumar_resumen('NEW', '+')}END"
+    ))
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS articulos_resumen_delete AFTER DELETE ON articulos BEGIN "
+        f"{_sumar_resumen('OLD', '-')}END"
+    ))
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS articulos_resumen_update AFTER UPDATE OF "
+        "departamento_numero, clase_numero, familia_numero, stock, cantidad, descontinuado ON articulos BEGIN "
+        f"{_sumar_resumen('OLD', '-')}{_sumar_resumen('NEW', '+')}END"
+    ))
+    from .resumen import reconstruir
+    reconstruir(conn)
+
+# Migraciones en orden: (versión, descripción, función que recibe la conexión)
+MIGRACIONES = [
+    (1, "esquema base, índices de articulos y bitácora de cambios", _v1_esquema_base),
+    (2, "búsqueda de texto completo en articulos (FTS5)", _v2_busqueda_texto),
+    (3, "resumen de inventario por familia mantenido con triggers", _v3_resumen_inventario),
+]
+
+def version_actual(conn) -> int:
+    """
+    Obtiene la versión del esquema de la base de datos.
+
+    Args:
+        conn (Connection): Conexión a la base de datos.
+
+    Returns:
+        int: La última migración aplicada, o 0 si no se ha aplicado ninguna.
+    """
+    if not inspect(conn).has_table(models.VersionEsquema.__tablename__):
+        return 0
+    return conn.execute(select(func.coalesce(func.max(models.VersionEsquema.version), 0))).scalar()
+
+def migrar(engine):
+    """
+    Aplica en orden las migraciones pendientes, cada una en su propia transacción.
+
+    Args:
+        engine (Engine): Motor de la base de datos.
+
+    Returns:
+        int: La versión del esquema tras aplicar las migraciones.
+    """
+    with engine.connect() as conn:
+        version = version_actual(conn)
+    if version >= MIGRACIONES[-1][0]:
+        return version
+
+    for numero, descripcion, migracion in MIGRACIONES:
+        if numero <= version:
+            continue
+        with engine.execution_options(**OPCION_ESCRITURA).begin() as conn:
+            migracion(conn)
+            conn.execute(
+                insert(models.VersionEsquema)
+                .values(version=numero, descripcion=descripcion, fecha=datetime.now())
+                .on_conflict_do_nothing()
+            )
+        print(f"Migración {numero} aplicada: {descripcion}")
+        version = numero
+    return version
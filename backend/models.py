@@ -1,11 +1,9 @@
-from sqlalchemy import Column, Integer, String, Date, ForeignKey
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from pydantic import BaseModel, Field
 from datetime import date
-from typing import Optional
-
-Base = declarative_base()
+from typing import List, Optional
+from .database import Base
 
 class Departamento(Base):
     """
@@ -97,6 +95,119 @@ class Articulo(Base):
     clase = relationship("Clase")
     familia = relationship("Familia")
 
+    # Índices para el listado filtrado: terminan en 'sku' para que la paginación por
+    # llave (sku > :ultimo) avance sobre el mismo índice que aplica el filtro. Esto
+    # solo ocurre con filtros de igualdad sobre todas las columnas que preceden a
+    # 'sku' (por eso hay uno por cada prefijo del catálogo); con un rango de fechas
+    # SQLite ordena las filas del rango (TEMP B-TREE) o recorre el índice de 'sku'.
+    # benchmarks/planes.py revisa el plan de cada forma de filtro.
+    __table_args__ = (
+        Index("ix_articulos_departamento_sku", "departamento_numero", "sku"),
+        Index("ix_articulos_clase_sku", "departamento_numero", "clase_numero", "sku"),
+        Index("ix_articulos_catalogo_sku", "departamento_numero", "clase_numero", "familia_numero", "sku"),
+        Index("ix_articulos_marca_sku", "marca", "sku"),
+        Index("ix_articulos_descontinuado_sku", "descontinuado", "sku"),
+        Index("ix_articulos_fecha_alta_sku", "fecha_alta", "sku"),
+        Index("ix_articulos_fecha_baja_sku", "fecha_baja", "sku"),
+    )
+
+# Tablas cuyas altas, cambios y bajas se registran en 'cambios', con su clave primaria.
+TABLAS_RASTREADAS = {
+    "departamentos": "numero",
+    "clases": "numero",
+    "familias": "numero",
+    "articulos": "sku",
+}
+
+class ResumenInventario(Base):
+    """
+    Modelo de la tabla 'resumen_inventario', totales de 'articulos' por familia.
+
+    Los triggers de SQLite la mantienen al día en cada alta, cambio y baja de
+    artículos; las claves nulas se guardan como cadena vacía.
+
+    Attributes:
+        departamento_numero (str): Número del departamento.
+        clase_numero (str): Número de la clase.
+        familia_numero (str): Número de la familia.
+        skus (int): Número de artículos de la familia.
+        descontinuados (int): Número de artículos descontinuados.
+        stock (int): Suma del stock de los artículos.
+        cantidad (int): Suma de la cantidad de los artículos.
+    """
+    __tablename__ = "resumen_inventario"
+    departamento_numero = Column(String(1), primary_key=True)
+    clase_numero = Column(String(2), primary_key=True)
+    familia_numero = Column(String(3), primary_key=True)
+    skus = Column(Integer, nullable=False, default=0)
+    descontinuados = Column(Integer, nullable=False, default=0)
+    stock = Column(Integer, nullable=False, default=0)
+    cantidad = Column(Integer, nullable=False, default=0)
+
+class Cambio(Base):
+    """
+    Modelo de la tabla 'cambios', bitácora de altas, cambios y bajas.
+
+    Los registros se generan con triggers de SQLite sobre las tablas de
+    TABLAS_RASTREADAS, por lo que cubren cualquier ruta de escritura.
+
+    Attributes:
+        id (int): Identificador creciente del cambio (nunca se reutiliza).
+        tabla (str): Nombre de la tabla modificada.
+        clave (str): Clave primaria del registro modificado.
+        operacion (str): 'I' (alta), 'U' (cambio) o 'D' (baja).
+    """
+    __tablename__ = "cambios"
+    id = Column(Integer, primary_key=True)
+    tabla = Column(String(20), nullable=False)
+    clave = Column(String(6), nullable=False)
+    operacion = Column(String(1), nullable=False)
+
+    __table_args__ = (
+        Index("ix_cambios_tabla_id", "tabla", "id"),
+        {"sqlite_autoincrement": True},
+    )
+
+class MarcaExportacion(Base):
+    """
+    Modelo de la tabla 'marcas_exportacion', último cambio exportado por tabla.
+
+    Attributes:
+        tabla (str): Nombre de la tabla exportada.
+        ultimo_cambio (int): Id del último registro de 'cambios' incluido en la exportación.
+        fecha (datetime): Fecha y hora de la última exportación incremental.
+    """
+    __tablename__ = "marcas_exportacion"
+    tabla = Column(String(20), primary_key=True)
+    ultimo_cambio = Column(Integer, nullable=False)
+    fecha = Column(DateTime)
+
+class VersionEsquema(Base):
+    """
+    Modelo de la tabla 'version_esquema', migraciones aplicadas a la base de datos.
+
+    Attributes:
+        version (int): Número de la migración.
+        descripcion (str): Descripción de la migración.
+        fecha (datetime): Fecha y hora en que se aplicó.
+    """
+    __tablename__ = "version_esquema"
+    version = Column(Integer, primary_key=True)
+    descripcion = Column(String(100))
+    fecha = Column(DateTime)
+
+class Metadato(Base):
+    """
+    Modelo de la tabla 'metadatos', valores de control de la aplicación.
+
+    Attributes:
+        clave (str): Nombre del valor (por ejemplo 'catalogo_sha256').
+        valor (str): Valor almacenado.
+    """
+    __tablename__ = "metadatos"
+    clave = Column(String(50), primary_key=True)
+    valor = Column(String(200))
+
 class ArticuloBase(BaseModel):
     """
     Modelo base para los artículos.
@@ -153,18 +264,80 @@ class ArticuloUpdate(BaseModel):
     cantidad: Optional[int] = Field(None, le=999999999)
     descontinuado: Optional[int] = Field(None, le=1)
 
-class ArticuloInDB(ArticuloBase):
+class AjusteStock(BaseModel):
+    """
+    Modelo de un ajuste relativo de las existencias de un artículo.
+
+    Attributes:
+        sku (str): Código SKU del artículo.
+        delta_stock (int): Cantidad a sumar (o restar, si es negativa) al stock.
+        delta_cantidad (int): Cantidad a sumar (o restar, si es negativa) a la cantidad disponible.
+    """
+    sku: str = Field(..., max_length=6)
+    delta_stock: int = Field(0, ge=-999999999, le=999999999)
+    delta_cantidad: int = Field(0, ge=-999999999, le=999999999)
+
+class SeleccionArticulos(BaseModel):
+    """
+    Modelo para seleccionar artículos en operaciones masivas.
+
+    Los criterios indicados se combinan con AND; debe indicarse al menos uno.
+
+    Attributes:
+        skus (Optional[List[str]]): Códigos SKU de los artículos.
+        departamento_numero (Optional[str]): Solo artículos de este departamento.
+        clase_numero (Optional[str]): Solo artículos de esta clase.
+        familia_numero (Optional[str]): Solo artículos de esta familia.
+    """
+    skus: Optional[List[str]] = None
+    departamento_numero: Optional[str] = Field(None, max_length=1)
+    clase_numero: Optional[str] = Field(None, max_length=2)
+    familia_numero: Optional[str] = Field(None, max_length=3)
+
+class ConsultaSkus(BaseModel):
+    """
+    Modelo para consultar varios artículos a la vez.
+
+    Attributes:
+        skus (List[str]): Códigos SKU a consultar.
+    """
+    skus: List[str]
+
+class ArticuloInDB(BaseModel):
     """
     Modelo que representa un artículo almacenado en la base de datos.
 
+    Es el esquema de las respuestas, no de las peticiones: salvo el SKU, las
+    columnas pueden ser NULL o exceder los límites de ArticuloBase en registros
+    anteriores a la API, por lo que ningún campo es obligatorio ni se valida
+    su longitud o rango; esos valores se responden tal como están guardados.
+
     Attributes:
-        fecha_alta (date): Fecha de alta del artículo.
-        descontinuado (int): Indicador de si el artículo está descontinuado.
-        fecha_baja (date): Fecha de baja del artículo.
+        sku (str): Código SKU del artículo.
+        articulo (Optional[str]): Nombre del artículo.
+        marca (Optional[str]): Marca del artículo.
+        modelo (Optional[str]): Modelo del artículo.
+        departamento_numero (Optional[str]): Número de identificación del departamento al que pertenece el artículo.
+        clase_numero (Optional[str]): Número de identificación de la clase a la que pertenece el artículo.
+        familia_numero (Optional[str]): Número de identificación de la familia a la que pertenece el artículo.
+        stock (Optional[int]): Cantidad en stock del artículo.
+        cantidad (Optional[int]): Cantidad disponible del artículo.
+        fecha_alta (Optional[date]): Fecha de alta del artículo.
+        descontinuado (Optional[int]): Indicador de si el artículo está descontinuado.
+        fecha_baja (Optional[date]): Fecha de baja del artículo.
     """
-    fecha_alta: date
-    descontinuado: int
-    fecha_baja: date
+    sku: str
+    articulo: Optional[str] = None
+    marca: Optional[str] = None
+    modelo: Optional[str] = None
+    departamento_numero: Optional[str] = None
+    clase_numero: Optional[str] = None
+    familia_numero: Optional[str] = None
+    stock: Optional[int] = None
+    cantidad: Optional[int] = None
+    fecha_alta: Optional[date] = None
+    descontinuado: Optional[int] = None
+    fecha_baja: Optional[date] = None
 
     class Config:
         orm_mode = True
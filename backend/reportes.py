@@ -0,0 +1,84 @@
+"""
+This module computes aggregated inventory reports from the 'resumen_inventario' table.
+
+The summary table holds one row per family and is kept current by SQLite
+triggers, so a report reads O(#families) rows instead of scanning the
+articles. Results are also cached in memory per grouping level and the cache
+is cleared by `crud.registrar_escritura` after every article write.
+"""
+
+import threading
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from . import models
+from .resumen import COLUMNAS_TOTALES
+
+# Columns grouped by at each report level.
+NIVELES = {
+    "total": (),
+    "departamento": ("departamento_numero",),
+    "clase": ("departamento_numero", "clase_numero"),
+    "familia": ("departamento_numero", "clase_numero", "familia_numero"),
+}
+
+def _calcular(db: Session, nivel: str):
+    """
+    Runs the aggregation query of a report level.
+
+    Args:
+        db (Session): The database session.
+        nivel (str): The report level, a key of NIVELES.
+
+    Returns:
+        List[dict]: One row per group with SKU, discontinued, stock and quantity totals.
+    """
+    tabla = models.ResumenInventario.__table__
+    grupos = [tabla.c[columna] for columna in NIVELES[nivel]]
+    consulta = select(
+        *grupos,
+        *(func.coalesce(func.sum(tabla.c[columna]), 0).label(columna) for columna in COLUMNAS_TOTALES),
+    )
+    if grupos:
+        consulta = consulta.group_by(*grupos).order_by(*grupos)
+    return [dict(fila) for fila in db.execute(consulta).mappings()]
+
+class CacheReportes:
+    """
+    Per-level cache of the inventory reports, cleared on every article write.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reportes = {}
+        self._version = 0
+
+    def obtener(self, db: Session, nivel: str):
+        """
+        Returns a report, computing it if it is not cached.
+
+        Args:
+            db (Session): The database session.
+            nivel (str): The report level, a key of NIVELES.
+
+        Returns:
+            List[dict]: The report rows.
+        """
+        reporte = self._reportes.get(nivel)
+        if reporte is None:
+            version = self._version
+            reporte = _calcular(db, nivel)
+            with self._lock:
+                # Do not cache a result computed while a write was being committed
+                if version == self._version:
+                    self._reportes[nivel] = reporte
+        return reporte
+
+    def invalidar(self):
+        """
+        Clears every cached report.
+        """
+        with self._lock:
+            self._version += 1
+            self._reportes = {}
+
+cache = CacheReportes()
@@ -0,0 +1,102 @@
+"""
+This module rebuilds and checks the 'resumen_inventario' summary table.
+
+The table holds per-family totals of the articles and is kept current by the
+SQLite triggers created in migration 3. `reconstruir` recomputes it from
+'articulos' and `verificar` reports the families whose totals drifted.
+
+Usage:
+    python -m backend.resumen [--reconstruir]
+"""
+
+from sqlalchemy import delete, func, insert, select
+from . import models
+
+COLUMNAS_CLAVE = ("departamento_numero", "clase_numero", "familia_numero")
+COLUMNAS_TOTALES = ("skus", "descontinuados", "stock", "cantidad")
+
+def _totales_articulos():
+    """
+    Builds the query that aggregates the articles per family, as stored in the summary.
+
+    Returns:
+        Select: The aggregation query.
+    """
+    tabla = models.Articulo.__table__
+    claves = [func.coalesce(tabla.c[columna], "").label(columna) for columna in COLUMNAS_CLAVE]
+    return select(
+        *claves,
+        func.count().label("skus"),
+        func.coalesce(func.sum(func.coalesce(tabla.c.descontinuado, 0)), 0).label("descontinuados"),
+        func.coalesce(func.sum(func.coalesce(tabla.c.stock, 0)), 0).label("stock"),
+        func.coalesce(func.sum(func.coalesce(tabla.c.cantidad, 0)), 0).label("cantidad"),
+    ).group_by(*claves)
+
+def reconstruir(conn):
+    """
+    Recomputes the summary table from the articles.
+
+    Args:
+        conn (Connection | Session): The database connection; the caller commits.
+
+    Returns:
+        int: The number of families in the summary.
+    """
+    resumen = models.ResumenInventario.__table__
+    conn.execute(delete(resumen))
+    conn.execute(insert(resumen).from_select(COLUMNAS_CLAVE + COLUMNAS_TOTALES, _totales_articulos()))
+    return conn.execute(select(func.count()).select_from(resumen)).scalar()
+
+def verificar(conn):
+    """
+    Compares the summary table with the totals computed from the articles.
+
+    Args:
+        conn (Connection | Session): The database connection.
+
+    Returns:
+        List[dict]: One entry per inconsistent family with its 'esperado' and 'actual'
+        totals (None when the family is missing on that side). Empty if consistent.
+    """
+    def _por_clave(filas):
+        return {
+            tuple(fila[columna] for columna in COLUMNAS_CLAVE): {columna: fila[columna] for columna in COLUMNAS_TOTALES}
+            for fila in filas
+        }
+
+    esperado = _por_clave(conn.execute(_totales_articulos()).mappings())
+    actual = _por_clave(conn.execute(select(models.ResumenInventario.__table__)).mappings())
+    diferencias = []
+    for clave in sorted(esperado.keys() | actual.keys()):
+        if esperado.get(clave) != actual.get(clave):
+            diferencias.append({
+                **dict(zip(COLUMNAS_CLAVE, clave)),
+                "esperado": esperado.get(clave),
+                "actual": actual.get(clave),
+            })
+    return diferencias
+
+def main():
+    import argparse
+    import sys
+    from .database import OPCION_ESCRITURA, engine, init_db
+
+    parser = argparse.ArgumentParser(description="Verifica o reconstruye el resumen de inventario por familia.")
+    parser.add_argument("--reconstruir", action="store_true", help="Recalcula el resumen a partir de los artículos")
+    args = parser.parse_args()
+
+    init_db()
+    if args.reconstruir:
+        with engine.execution_options(**OPCION_ESCRITURA).begin() as conn:
+            print(f"Resumen reconstruido: {reconstruir(conn)} familias")
+        return
+
+    with engine.connect() as conn:
+        diferencias = verificar(conn)
+    for diferencia in diferencias:
+        print(diferencia)
+    print("El resumen es consistente" if not diferencias else f"{len(diferencias)} familias inconsistentes")
+    sys.exit(1 if diferencias else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+This module contains the async versions of the per-SKU article endpoints.
+
+When the backend runs with `ABCC_DB_MODO=async`, `main` mounts this router
+ahead of the sync article routes, so these handlers serve the same paths
+using `AsyncSession` and never block a worker thread on the database.
+"""
+
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import crud, crud_async, database, models
+from .respuestas import RespuestaJSON
+
+router = APIRouter(default_response_class=RespuestaJSON)
+
+async def get_async_db():
+    """
+    Dependency to get an async database session.
+
+    Yields:
+        AsyncSession: A SQLAlchemy async database session.
+    """
+    async with database.AsyncSessionLocal() as db:
+        yield db
+
+@router.post("/articulos/", response_model=models.ArticuloInDB)
+async def crear_articulo(articulo: models.ArticuloCreate, db: AsyncSession = Depends(get_async_db)):
+    """
+    Creates a new article.
+
+    Args:
+        articulo (models.ArticuloCreate): The article data to create.
+        db (AsyncSession): The async database session.
+
+    Returns:
+        dict: The created article data.
+
+    Raises:
+        HTTPException: If there's an error creating the article.
+    """
+    try:
+        return await crud_async.crear_articulo(db, articulo)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/articulos/{sku}", response_model=models.ArticuloInDB)
+async def obtener_articulo(sku: str, fields: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
+    """
+    Retrieves an article by its SKU.
+
+    Args:
+        sku (str): The SKU of the article to retrieve.
+        fields (str): Comma-separated columns to return (e.g. 'sku,stock'); all by default.
+        db (AsyncSession): The async database session.
+
+    Returns:
+        dict: The article data.
+
+    Raises:
+        HTTPException: If a requested field does not exist or the article is not found.
+    """
+    try:
+        campos = crud.parsear_campos(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    articulo = await crud_async.obtener_articulo(db, sku, campos)
+    if articulo is None:
+        raise HTTPException(status_code=404, detail="Artículo no encontrado")
+    if campos:
+        # A projection does not match the response model, send it as is
+        return RespuestaJSON(articulo)
+    return articulo
+
+@router.put("/articulos/{sku}", response_model=Optional[models.ArticuloInDB])
+async def actualizar_articulo(sku: str, articulo: models.ArticuloUpdate, db: AsyncSession = Depends(get_async_db)):
+    """
+    Updates an existing article.
+
+    Args:
+        sku (str): The SKU of the article to update.
+        articulo (models.ArticuloUpdate): The updated article data.
+        db (AsyncSession): The async database session.
+
+    Returns:
+        dict: The updated article data.
+    """
+    return await crud_async.actualizar_articulo(db, sku, articulo)
+
+@router.delete("/articulos/{sku}", response_model=Optional[models.ArticuloInDB])
+async def eliminar_articulo(sku: str, db: AsyncSession = Depends(get_async_db)):
+    """
+    Deletes an article.
+
+    Args:
+        sku (str): The SKU of the article to delete.
+        db (AsyncSession): The async database session.
+
+    Returns:
+        dict: A message confirming the deletion.
+    """
+    return await crud_async.eliminar_articulo(db, sku)
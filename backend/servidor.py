@@ -0,0 +1,42 @@
+"""
+Launches the API with several uvicorn worker processes.
+
+SQLite allows a single writer at a time, but any number of readers, so extra
+workers let read traffic use more than one core. The number of workers
+defaults to the CPU cores available to the process. Every worker runs the
+startup under `database.bloqueo_arranque`, so only one of them migrates and
+loads the catalog, and polls the change log to keep its caches coherent with
+the writes served by the others (see `coherencia`).
+
+Usage:
+    python -m backend.servidor [--host 127.0.0.1] [--port 8000] [--workers N]
+"""
+
+import argparse
+import os
+
+def nucleos_disponibles() -> int:
+    """
+    Counts the CPU cores the process may run on.
+
+    Returns:
+        int: The number of cores.
+    """
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # Not available on Windows and macOS
+        return os.cpu_count() or 1
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Inicia la API con un worker por núcleo.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=nucleos_disponibles(), help="Número de procesos (por omisión, uno por núcleo)")
+    args = parser.parse_args()
+
+    uvicorn.run("backend.main:app", host=args.host, port=args.port, workers=args.workers)
+
+if __name__ == "__main__":
+    main()
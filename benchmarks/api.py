@@ -0,0 +1,288 @@
+"""
+Benchmark of the API endpoints, driven in-process through the ASGI interface.
+
+Seeds `sql_app.db` in a working directory with a synthetic catalog and the
+requested number of articles (reused by later runs of the same scale), then
+sends requests to the FastAPI app through `httpx.ASGITransport` with a
+configurable number of concurrent clients. For every operation (get, create,
+update, delete, catalog lookups and CSV export) it prints the p50/p95/p99
+latency and the throughput, and writes the results as JSON so runs can be
+compared with `--comparar`.
+
+Usage:
+    python -m benchmarks.api [--escala 1k|100k|1m] [--concurrencia 8] [--operaciones 2000]
+                             [--salida resultados.json] [--comparar resultados_anteriores.json]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import time
+from datetime import datetime
+import httpx
+from sqlalchemy import func, insert, select
+
+ESCALAS = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+
+# Created SKUs are 'N' and five digits, to fit the 6-character sku column.
+MAXIMO_OPERACIONES = 100_000
+
+# Rows per executemany batch when seeding the articles.
+TAMANO_LOTE = 50_000
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+
+def catalogo_sintetico(departamentos: int = 4, clases: int = 5, familias: int = 10):
+    """
+    Builds a catalog tree in the format read by `importacion`.
+
+    Args:
+        departamentos (int): The number of departments (at most 9).
+        clases (int): The number of classes per department (at most 9).
+        familias (int): The number of families per class (at most 10).
+
+    Returns:
+        dict: The catalog.
+    """
+    return {"departamentos": [
+        {
+            "numero": str(d),
+            "nombre": f"DEPARTAMENTO {d}",
+            "clases": [
+                {
+                    "numero": f"{c:02d}",
+                    "nombre": f"CLASE {d}{c}",
+                    "familias": [{"numero": f"{d}{c}{f}", "nombre": f"FAMILIA {d}{c}{f}"} for f in range(familias)],
+                }
+                for c in range(1, clases + 1)
+            ],
+        }
+        for d in range(1, departamentos + 1)
+    ]}
+
+def sembrar(articulos: int):
+    """
+    Initializes the database of the current directory with the synthetic catalog and articles.
+
+    The articles get the SKUs '000000', '000001', ... and are only inserted if
+    the database does not already hold exactly `articulos` of them.
+
+    Args:
+        articulos (int): The number of articles.
+
+    Returns:
+        List[tuple]: The (departamento, clase, familia) keys of the catalog.
+    """
+    from backend import catalogo, crud, database, models
+
+    with open("datos.json", "w", encoding="utf-8") as f:
+        json.dump(catalogo_sintetico(), f)
+    database.init_db()
+    db = database.SessionLocal()
+    try:
+        crud.sincronizar_catalogo(db)
+        familias = sorted(catalogo.cache.obtener(db).claves[2])
+        existentes = db.execute(select(func.count()).select_from(models.Articulo)).scalar()
+    finally:
+        db.close()
+    if existentes == articulos:
+        return familias
+
+    tabla = models.Articulo.__table__
+    with database.engine.begin() as conn:
+        conn.execute(tabla.delete())
+    hoy = datetime.now().date()
+    for inicio in range(0, articulos, TAMANO_LOTE):
+        filas = []
+        for i in range(inicio, min(inicio + TAMANO_LOTE, articulos)):
+            departamento, clase, familia = familias[i % len(familias)]
+            filas.append({
+                "sku": f"{i:06d}", "articulo": f"ARTICULO {i % 997}", "marca": f"MARCA {i % 53}",
+                "modelo": f"MODELO {i % 211}", "departamento_numero": departamento, "clase_numero": clase,
+                "familia_numero": familia, "fecha_alta": hoy, "stock": 100, "cantidad": 10, "descontinuado": 0,
+            })
+        with database.engine.begin() as conn:
+            conn.execute(insert(tabla), filas)
+        print(f"Sembrados {min(inicio + TAMANO_LOTE, articulos)} de {articulos} artículos")
+    return familias
+
+def _percentil(ordenadas, p):
+    return ordenadas[max(0, math.ceil(p / 100 * len(ordenadas)) - 1)]
+
+async def medir(cliente, operacion, operaciones: int, concurrencia: int):
+    """
+    Runs an operation a number of times with several concurrent clients.
+
+    Args:
+        cliente (httpx.AsyncClient): The client bound to the app.
+        operacion (callable): Coroutine function `(cliente, i)` that sends one request.
+        operaciones (int): The number of requests.
+        concurrencia (int): The number of concurrent clients.
+
+    Returns:
+        dict: The latency percentiles in milliseconds, throughput and errors.
+    """
+    latencias = []
+    errores = 0
+    pendientes = iter(range(operaciones))
+
+    async def trabajador():
+        nonlocal errores
+        for i in pendientes:
+            inicio = time.perf_counter()
+            respuesta = await operacion(cliente, i)
+            latencias.append(time.perf_counter() - inicio)
+            if respuesta.status_code >= 400:
+                errores += 1
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(trabajador() for _ in range(max(1, min(concurrencia, operaciones)))))
+    segundos = time.perf_counter() - inicio
+    ordenadas = sorted(latencias)
+    return {
+        "operaciones": operaciones,
+        "errores": errores,
+        "segundos": round(segundos, 3),
+        "por_segundo": round(operaciones / segundos, 1),
+        "p50_ms": round(_percentil(ordenadas, 50) * 1000, 3),
+        "p95_ms": round(_percentil(ordenadas, 95) * 1000, 3),
+        "p99_ms": round(_percentil(ordenadas, 99) * 1000, 3),
+        "max_ms": round(ordenadas[-1] * 1000, 3),
+    }
+
+def escenarios(articulos: int, familias, operaciones: int, operaciones_export: int):
+    """
+    Builds the benchmarked operations, in the order they must run.
+
+    'crear' inserts the SKUs 'N00000', 'N00001', ... that 'actualizar' and
+    'eliminar' then modify and delete, so the seeded articles are left intact.
+
+    Args:
+        articulos (int): The number of seeded articles.
+        familias (list): The catalog keys returned by `sembrar`.
+        operaciones (int): The number of requests per operation.
+        operaciones_export (int): The number of full CSV exports.
+
+    Returns:
+        List[tuple]: The name, coroutine function and number of requests of each operation.
+    """
+    rng = random.Random(42)
+    rutas_catalogo = ["/catalogo", "/departamentos/"]
+    for departamento, clase, _ in familias:
+        rutas_catalogo += [f"/clases/{departamento}", f"/familias/{departamento}/{departamento}{clase}"]
+
+    def nuevo(i):
+        departamento, clase, familia = familias[i % len(familias)]
+        return {
+            "sku": f"N{i:05d}", "articulo": "NUEVO", "marca": "MARCA", "modelo": "MODELO",
+            "departamento_numero": departamento, "clase_numero": clase, "familia_numero": familia,
+            "stock": 10, "cantidad": 1,
+        }
+
+    return [
+        ("obtener", lambda c, i: c.get(f"/articulos/{rng.randrange(articulos):06d}"), operaciones),
+        ("crear", lambda c, i: c.post("/articulos/", json=nuevo(i)), operaciones),
+        ("actualizar", lambda c, i: c.put(f"/articulos/N{i:05d}", json={"stock": 20 + i % 50}), operaciones),
+        ("eliminar", lambda c, i: c.delete(f"/articulos/N{i:05d}"), operaciones),
+        ("catalogo", lambda c, i: c.get(rutas_catalogo[i % len(rutas_catalogo)]), operaciones),
+        ("exportar_csv", lambda c, i: c.get("/export/articulos.csv"), operaciones_export),
+    ]
+
+async def ejecutar(articulos: int, familias, concurrencia: int, operaciones: int, operaciones_export: int):
+    """
+    Starts the app and measures every operation.
+
+    Returns:
+        dict: The results of each operation.
+    """
+    from backend.main import app
+
+    resultados = {}
+    transporte = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transporte, base_url="http://benchmark", timeout=None) as cliente:
+            for nombre, operacion, n in escenarios(articulos, familias, operaciones, operaciones_export):
+                resultados[nombre] = await medir(cliente, operacion, n, concurrencia)
+                print(f"{nombre:>13}: {resultados[nombre]}")
+    return resultados
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def comparar(anterior: dict, actual: dict):
+    """
+    Prints the change of throughput and p95 latency of each operation against a previous run.
+
+    Args:
+        anterior (dict): The results of the previous run.
+        actual (dict): The results of this run.
+    """
+    print(f"Comparación con {anterior.get('commit')} ({anterior.get('fecha')}):")
+    for nombre, resultado in actual["resultados"].items():
+        previo = anterior["resultados"].get(nombre)
+        if not previo:
+            continue
+        rendimiento = (resultado["por_segundo"] / previo["por_segundo"] - 1) * 100
+        p95 = (resultado["p95_ms"] / previo["p95_ms"] - 1) * 100 if previo["p95_ms"] else 0
+        print(f"{nombre:>13}: {rendimiento:+.1f}% por segundo, {p95:+.1f}% p95")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--escala", choices=ESCALAS, default="1k")
+    parser.add_argument("--concurrencia", type=int, default=8)
+    parser.add_argument("--operaciones", type=int, default=2000)
+    parser.add_argument("--operaciones-export", type=int, default=3)
+    parser.add_argument("--directorio", help="Directorio de la base sembrada (por omisión benchmarks/datos/<escala>)")
+    parser.add_argument("--salida", help="Archivo JSON de resultados (por omisión benchmarks/resultados/api_<escala>_<fecha>.json)")
+    parser.add_argument("--comparar", help="Archivo JSON de una ejecución anterior")
+    args = parser.parse_args()
+    if not 1 <= args.operaciones <= MAXIMO_OPERACIONES:
+        parser.error(f"--operaciones debe estar entre 1 y {MAXIMO_OPERACIONES}")
+
+    articulos = ESCALAS[args.escala]
+    fecha = datetime.now()
+    salida = os.path.abspath(args.salida or os.path.join(
+        RAIZ, "resultados", f"api_{args.escala}_{fecha.strftime('%Y%m%d_%H%M%S')}.json"
+    ))
+    directorio = os.path.abspath(args.directorio or os.path.join(RAIZ, "datos", args.escala))
+    os.makedirs(directorio, exist_ok=True)
+    # The app opens './sql_app.db' and './datos.json'; SQLAlchemy resolves the
+    # database path when `backend.database` is imported, so import it afterwards.
+    os.chdir(directorio)
+    from backend import database
+
+    familias = sembrar(articulos)
+    resultados = asyncio.run(ejecutar(articulos, familias, args.concurrencia, args.operaciones, args.operaciones_export))
+    informe = {
+        "fecha": fecha.isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "escala": args.escala,
+        "articulos": articulos,
+        "concurrencia": args.concurrencia,
+        "modo": database.DB_MODO,
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "resultados": resultados,
+    }
+    os.makedirs(os.path.dirname(salida), exist_ok=True)
+    with open(salida, "w", encoding="utf-8") as f:
+        json.dump(informe, f, indent=2)
+    print(f"Resultados guardados en {salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            comparar(json.load(f), informe)
+
+if __name__ == "__main__":
+    main()
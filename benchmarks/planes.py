@@ -0,0 +1,84 @@
+"""
+Check of the SQLite query plan of the filtered article listing, for every filter shape.
+
+Builds each page query with `crud.consulta_listado` and runs it through
+`EXPLAIN QUERY PLAN`. Equality filters on a prefix of the catalog columns, on
+the brand or on the discontinued flag must be served together with the
+`sku > :despues_de` seek, without sorting; date ranges are expected to need a
+sort (TEMP B-TREE) or a walk of the SKU index, and are only reported.
+
+By default the plans are taken on a new, empty database with every migration
+applied. The app never runs ANALYZE, so the planner relies on the same
+heuristics there as on a populated database; pass `--base` to check an
+existing database file instead.
+
+Usage:
+    python -m benchmarks.planes [--base sql_app.db]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from datetime import date
+from sqlalchemy import text
+from sqlalchemy.dialects import sqlite
+from backend import crud, database, migraciones
+
+# (name, filters, whether the page must be served without sorting)
+FORMAS = [
+    ("sin filtros", {}, True),
+    ("departamento", {"departamento_numero": "1"}, True),
+    ("departamento y clase", {"departamento_numero": "1", "clase_numero": "01"}, True),
+    ("departamento, clase y familia", {"departamento_numero": "1", "clase_numero": "01", "familia_numero": "001"}, True),
+    ("marca", {"marca": "MARCA"}, True),
+    ("descontinuado", {"descontinuado": 1}, True),
+    ("activo", {"descontinuado": 0}, True),
+    ("departamento y marca", {"departamento_numero": "1", "marca": "MARCA"}, True),
+    ("rango de fecha de alta", {"fecha_alta_desde": date(2024, 1, 1), "fecha_alta_hasta": date(2024, 12, 31)}, False),
+    ("rango de fecha de baja", {"fecha_baja_desde": date(2024, 1, 1)}, False),
+    ("departamento y rango de fecha de alta", {"departamento_numero": "1", "fecha_alta_desde": date(2024, 1, 1)}, True),
+]
+
+def plan(conn, filtros: dict):
+    """
+    Gets the query plan of the second page of a listing.
+
+    Args:
+        conn (Connection): The database connection.
+        filtros (dict): The filters, as passed to `crud.listar_articulos`.
+
+    Returns:
+        List[str]: The steps of the plan.
+    """
+    consulta = crud.consulta_listado(filtros, despues_de="000100", limite=100)
+    sql = consulta.compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True})
+    return [fila[3] for fila in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+
+def main():
+    parser = argparse.ArgumentParser(description="Revisa el plan de consulta del listado de artículos.")
+    parser.add_argument("--base", help="Archivo SQLite a revisar (por omisión, una base nueva y vacía)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = args.base or os.path.join(directorio, "planes.db")
+        motor = database.crear_motor(f"sqlite:///{ruta}")
+        if args.base is None:
+            migraciones.migrar(motor)
+        fallidas = []
+        with motor.connect() as conn:
+            for nombre, filtros, sin_orden in FORMAS:
+                pasos = plan(conn, filtros)
+                ordena = any("TEMP B-TREE" in paso for paso in pasos)
+                estado = "FALLA" if sin_orden and ordena else "ok"
+                if estado == "FALLA":
+                    fallidas.append(nombre)
+                print(f"{estado:5}  {nombre}: {' | '.join(pasos)}")
+        motor.dispose()
+
+    if fallidas:
+        print(f"Formas que ordenan en un B-tree temporal: {', '.join(fallidas)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,114 @@
+"""
+Benchmark of concurrent reads and writes on SQLite, before and after the performance profile.
+
+Runs several reader threads doing SKU lookups while one writer thread inserts
+and updates articles, first with SQLite's default settings (rollback journal)
+and then with `database.PERFIL_SQLITE` (WAL and the tuned PRAGMAs), and prints
+the throughput and the number of "database is locked" errors of each run.
+
+Usage:
+    python -m benchmarks.sqlite_concurrencia [--lectores 8] [--segundos 5] [--articulos 20000]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import OperationalError
+from backend import database, models
+
+def sembrar(motor, articulos: int):
+    """
+    Creates the schema and inserts synthetic articles.
+
+    Args:
+        motor (Engine): The database engine.
+        articulos (int): The number of articles to insert.
+    """
+    models.Base.metadata.create_all(bind=motor)
+    filas = [
+        {
+            "sku": f"{i:06d}", "articulo": "ARTICULO", "marca": "MARCA", "modelo": "MODELO",
+            "departamento_numero": "1", "clase_numero": "01", "familia_numero": "001",
+            "stock": 100, "cantidad": 10, "descontinuado": 0,
+        }
+        for i in range(articulos)
+    ]
+    with motor.begin() as conn:
+        conn.execute(insert(models.Articulo), filas)
+
+def ejecutar(perfil, lectores: int, segundos: float, articulos: int):
+    """
+    Runs the concurrent workload against a fresh database.
+
+    Args:
+        perfil (dict): The PRAGMAs to apply to every connection.
+        lectores (int): The number of reader threads.
+        segundos (float): The duration of the run.
+        articulos (int): The number of seeded articles.
+
+    Returns:
+        dict: Reads and writes per second and lock errors.
+    """
+    directorio = tempfile.mkdtemp()
+    motor = database.crear_motor(f"sqlite:///{os.path.join(directorio, 'bench.db')}", perfil)
+    sembrar(motor, articulos)
+    tabla = models.Articulo.__table__
+    fin = time.perf_counter() + segundos
+    contadores = {"lecturas": 0, "escrituras": 0, "bloqueos": 0}
+    candado = threading.Lock()
+
+    def sumar(clave):
+        with candado:
+            contadores[clave] += 1
+
+    def lector():
+        rng = random.Random()
+        while time.perf_counter() < fin:
+            try:
+                with motor.connect() as conn:
+                    conn.execute(select(tabla).where(tabla.c.sku == f"{rng.randrange(articulos):06d}")).first()
+                sumar("lecturas")
+            except OperationalError:
+                sumar("bloqueos")
+
+    def escritor():
+        siguiente = articulos
+        while time.perf_counter() < fin:
+            try:
+                with motor.begin() as conn:
+                    conn.execute(insert(tabla).values(sku=f"{siguiente:06d}", stock=1, cantidad=0, descontinuado=0))
+                    conn.execute(update(tabla).where(tabla.c.sku == f"{siguiente % articulos:06d}").values(stock=tabla.c.stock + 1))
+                siguiente += 1
+                sumar("escrituras")
+            except OperationalError:
+                sumar("bloqueos")
+
+    hilos = [threading.Thread(target=lector) for _ in range(lectores)] + [threading.Thread(target=escritor)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    motor.dispose()
+    return {
+        "lecturas_por_segundo": round(contadores["lecturas"] / segundos),
+        "escrituras_por_segundo": round(contadores["escrituras"] / segundos),
+        "errores_bloqueo": contadores["bloqueos"],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lectores", type=int, default=8)
+    parser.add_argument("--segundos", type=float, default=5)
+    parser.add_argument("--articulos", type=int, default=20000)
+    args = parser.parse_args()
+
+    for nombre, perfil in (("predeterminado", {}), ("rendimiento", database.PERFIL_SQLITE)):
+        resultado = ejecutar(perfil, args.lectores, args.segundos, args.articulos)
+        print(f"{nombre:>15}: {resultado}")
+
+if __name__ == "__main__":
+    main()
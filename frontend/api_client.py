@@ -0,0 +1,174 @@
+"""
+This module contains the HTTP client used by the Streamlit frontend to call the ABCC API.
+
+All calls share one pooled `requests.Session` (kept alive across reruns with
+`st.cache_resource`), with configurable timeouts and retries. Catalog and
+article lookups are cached with `st.cache_data`; every write through this
+module busts the cached article lookups.
+
+Configuration is read from the environment:
+    ABCC_API_URL: Base URL of the API (default http://localhost:8000).
+    ABCC_API_TIMEOUT_CONEXION / ABCC_API_TIMEOUT_LECTURA: Connect/read timeouts in seconds.
+    ABCC_API_REINTENTOS: Retries for idempotent requests on connection errors and 502/503/504.
+        Requests with side effects on the server (e.g. incremental exports, which advance the
+        export watermark) are sent with `reintentar=False` and are never retried.
+    ABCC_CATALOGO_TTL / ABCC_ARTICULO_TTL: Cache lifetimes in seconds.
+"""
+
+import os
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+BASE_URL = os.environ.get("ABCC_API_URL", "http://localhost:8000")
+TIMEOUT = (
+    float(os.environ.get("ABCC_API_TIMEOUT_CONEXION", "3")),
+    float(os.environ.get("ABCC_API_TIMEOUT_LECTURA", "30")),
+)
+REINTENTOS = int(os.environ.get("ABCC_API_REINTENTOS", "3"))
+CATALOGO_TTL = int(os.environ.get("ABCC_CATALOGO_TTL", "300"))
+ARTICULO_TTL = int(os.environ.get("ABCC_ARTICULO_TTL", "30"))
+
+@st.cache_resource
+def get_session(reintentar=True):
+    """
+    Creates the pooled HTTP session shared by every rerun and user of the app.
+
+    Args:
+        reintentar (bool): Whether idempotent requests are retried. A separate session
+            without retries is kept for requests that must be sent at most once.
+
+    Returns:
+        requests.Session: The session.
+    """
+    session = requests.Session()
+    retry = Retry(
+        total=REINTENTOS,
+        backoff_factor=0.2,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD", "PUT", "DELETE"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry if reintentar else 0)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def request(method, path, reintentar=True, **kwargs):
+    """
+    Sends a request to the API through the shared session.
+
+    Args:
+        method (str): The HTTP method.
+        path (str): The path of the endpoint, starting with '/'.
+        reintentar (bool): Whether the request may be retried (only idempotent methods are).
+        **kwargs: Extra arguments for `requests.Session.request`.
+
+    Returns:
+        requests.Response: The response.
+    """
+    kwargs.setdefault("timeout", TIMEOUT)
+    return get_session(reintentar).request(method, f"{BASE_URL}{path}", **kwargs)
+
+def get(path, reintentar=True, **kwargs):
+    """
+    Sends a GET request to the API.
+
+    Pass `reintentar=False` for GETs that are not idempotent, such as incremental exports.
+    """
+    return request("GET", path, reintentar=reintentar, **kwargs)
+
+def post(path, **kwargs):
+    """
+    Sends a POST request to the API and busts the cached article lookups.
+    """
+    try:
+        return request("POST", path, **kwargs)
+    finally:
+        invalidar_cache()
+
+def put(path, **kwargs):
+    """
+    Sends a PUT request to the API and busts the cached article lookups.
+    """
+    try:
+        return request("PUT", path, **kwargs)
+    finally:
+        invalidar_cache()
+
+def delete(path, **kwargs):
+    """
+    Sends a DELETE request to the API and busts the cached article lookups.
+    """
+    try:
+        return request("DELETE", path, **kwargs)
+    finally:
+        invalidar_cache()
+
+@st.cache_data(ttl=CATALOGO_TTL, show_spinner=False)
+def get_catalogo():
+    """
+    Fetches the department -> class -> family tree, cached for CATALOGO_TTL seconds.
+
+    Returns:
+        list: The catalog tree.
+
+    Raises:
+        requests.RequestException: If the request fails (failures are not cached).
+    """
+    response = get("/catalogo")
+    response.raise_for_status()
+    return response.json()
+
+@st.cache_data(ttl=ARTICULO_TTL, show_spinner=False)
+def get_articulo(sku):
+    """
+    Fetches an article by its SKU, cached for ARTICULO_TTL seconds.
+
+    Args:
+        sku (str): The SKU of the article.
+
+    Returns:
+        dict: The article data, or None if the SKU does not exist.
+
+    Raises:
+        requests.RequestException: If the request fails (failures are not cached).
+    """
+    response = get(f"/articulos/{sku}")
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return response.json()
+
+def get_sugerencias(prefix, limite=10):
+    """
+    Fetches the existing SKUs starting with a prefix from the backend SKU index.
+
+    It is answered from memory by the backend, so it is not cached here and
+    always reflects the latest writes.
+
+    Args:
+        prefix (str): The start of the SKU typed so far.
+        limite (int): The maximum number of suggestions.
+
+    Returns:
+        dict: `existe` (whether the prefix is an existing SKU) and `sugerencias`.
+
+    Raises:
+        requests.RequestException: If the request fails.
+    """
+    response = get("/articulos/sku-sugerencias", params={"prefix": prefix, "limite": limite})
+    response.raise_for_status()
+    return response.json()
+
+def invalidar_cache(catalogo=False):
+    """
+    Busts the cached article lookups, and optionally the cached catalog.
+
+    Args:
+        catalogo (bool): Whether to also bust the cached catalog.
+    """
+    get_articulo.clear()
+    if catalogo:
+        get_catalogo.clear()
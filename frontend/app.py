@@ -1,11 +1,10 @@
 import streamlit as st
 import requests
-import pandas as pd
-import sqlite3
 import os
 from datetime import datetime
 
-BASE_URL = "http://localhost:8000"
+import api_client
+import snapshots
 
 def main():
     """
@@ -29,60 +28,98 @@ def main():
     elif choice == "Generar CSV":
         generar_csv()
 
-def get_departamentos():
+def get_catalogo():
     """
-    Fetches the list of departments from the API.
+    Fetches the whole department -> class -> family tree from the API in a single request.
 
     Returns:
-        list: A list of department dictionaries if successful, empty list otherwise.
+        list: A list of department dictionaries, each with its classes and families, if successful,
+        empty list otherwise.
     """
-    response = requests.get(f"{BASE_URL}/departamentos/")
-    if response.status_code == 200:
-        return response.json()
-    else:
-        st.error("Error al obtener departamentos")
+    try:
+        return api_client.get_catalogo()
+    except requests.RequestException:
+        st.error("Error al obtener el catálogo")
         return []
 
-def get_clases(departamento_numero):
+def get_clases(catalogo, departamento_numero):
     """
-    Fetches the list of classes for a given department from the API.
+    Gets the list of classes for a given department from the catalog tree.
 
     Args:
-        departamento_numero (int): The department number.
+        catalogo (list): The catalog tree returned by get_catalogo.
+        departamento_numero (str): The department number.
 
     Returns:
-        list: A list of class dictionaries if successful, empty list otherwise.
+        list: A list of class dictionaries, empty list if the department has none.
     """
-    response = requests.get(f"{BASE_URL}/clases/{departamento_numero}")
-    if response.status_code == 200:
-        return response.json()
-    elif response.status_code == 404:
+    departamento = next((d for d in catalogo if d['numero'] == departamento_numero), None)
+    if departamento is None or not departamento['clases']:
         st.warning(f"No se encontraron clases para el departamento {departamento_numero}")
         return []
-    else:
-        st.error(f"Error al obtener clases para el departamento {departamento_numero}")
-        return []
+    return departamento['clases']
 
-def get_familias(departamento_numero, clase_numero):
+def get_familias(catalogo, departamento_numero, clase_numero):
     """
-    Fetches the list of families for a given department and class from the API.
+    Gets the list of families for a given department and class from the catalog tree.
 
     Args:
-        departamento_numero (int): The department number.
-        clase_numero (int): The class number.
+        catalogo (list): The catalog tree returned by get_catalogo.
+        departamento_numero (str): The department number.
+        clase_numero (str): The class number.
 
     Returns:
-        list: A list of family dictionaries if successful, empty list otherwise.
+        list: A list of family dictionaries, empty list if the class has none.
     """
-    response = requests.get(f"{BASE_URL}/familias/{departamento_numero}/{clase_numero}")
-    if response.status_code == 200:
-        return response.json()
-    elif response.status_code == 404:
+    clases = next((d['clases'] for d in catalogo if d['numero'] == departamento_numero), [])
+    clase = next((c for c in clases if c['numero'] == clase_numero), None)
+    if clase is None or not clase['familias']:
         st.warning(f"No se encontraron familias para el departamento {departamento_numero} y clase {clase_numero}")
         return []
-    else:
-        st.error(f"Error al obtener familias para el departamento {departamento_numero} y clase {clase_numero}")
-        return []
+    return clase['familias']
+
+def buscar_sku(sku):
+    """
+    Checks whether a SKU exists using the backend SKU index and shows similar SKUs.
+
+    This avoids fetching the whole article just to learn that it does not exist.
+
+    Args:
+        sku (str): The SKU typed by the user.
+
+    Returns:
+        bool: True if the SKU exists, None if the API could not be reached.
+    """
+    try:
+        resultado = api_client.get_sugerencias(sku)
+    except requests.RequestException:
+        st.error("Error al consultar el SKU")
+        return None
+    otros = [s for s in resultado["sugerencias"] if s != sku]
+    if otros:
+        st.caption("SKUs existentes: " + ", ".join(otros))
+    return resultado["existe"]
+
+def get_articulo(sku):
+    """
+    Fetches an article by its SKU if it exists.
+
+    Args:
+        sku (str): The SKU of the article.
+
+    Returns:
+        tuple: Whether the lookup succeeded and the article data (None if the SKU does not exist).
+    """
+    existe = buscar_sku(sku)
+    if existe is None:
+        return False, None
+    if not existe:
+        return True, None
+    try:
+        return True, api_client.get_articulo(sku)
+    except requests.RequestException:
+        st.error("Error al obtener el artículo")
+        return False, None
 
 def alta_articulo():
     """
@@ -94,15 +131,18 @@ def alta_articulo():
     sku = st.text_input("SKU", max_chars=6, key="alta_sku")
     
     if sku:
-        response = requests.get(f"{BASE_URL}/articulos/{sku}")
-        if response.status_code == 200:
+        existe = buscar_sku(sku)
+        if existe is None:
+            return
+        if existe:
             st.error("El SKU ya existe")
         else:
             articulo = st.text_input("Artículo", max_chars=15, key="alta_articulo")
             marca = st.text_input("Marca", max_chars=15, key="alta_marca")
             modelo = st.text_input("Modelo", max_chars=20, key="alta_modelo")
             
-            departamentos = get_departamentos()
+            catalogo = get_catalogo()
+            departamentos = catalogo
             departamento = st.selectbox(
                 "Departamento", 
                 options=[d['numero'] for d in departamentos], 
@@ -110,7 +150,7 @@ def alta_articulo():
                 key="alta_departamento"
             )
             
-            clases = get_clases(departamento) if departamento else []
+            clases = get_clases(catalogo, departamento) if departamento else []
             clase = st.selectbox(
                 "Clase", 
                 options=[c['numero'] for c in clases], 
@@ -118,7 +158,7 @@ def alta_articulo():
                 key="alta_clase"
             )
             
-            familias = get_familias(departamento, clase) if departamento and clase else []
+            familias = get_familias(catalogo, departamento, clase) if departamento and clase else []
             familia = st.selectbox(
                 "Familia", 
                 options=[f['numero'] for f in familias], 
@@ -145,7 +185,7 @@ def alta_articulo():
                     "cantidad": cantidad
                 }
                 st.write("Datos a enviar:", data)  # Print data for verification
-                response = requests.post(f"{BASE_URL}/articulos/", json=data)
+                response = api_client.post("/articulos/", json=data)
                 if response.status_code == 200:
                     st.success("Artículo guardado exitosamente")
                 else:
@@ -163,14 +203,15 @@ def baja_articulo():
     sku = st.text_input("SKU", max_chars=6, key="baja_sku")
     
     if sku:
-        response = requests.get(f"{BASE_URL}/articulos/{sku}")
-        if response.status_code == 200:
-            articulo = response.json()
+        encontrado, articulo = get_articulo(sku)
+        if not encontrado:
+            return
+        if articulo is not None:
             st.write(articulo)
             if st.button("Eliminar", key="baja_eliminar"):
                 confirm = st.checkbox("¿Está seguro de eliminar este artículo?", key="baja_confirm")
                 if confirm:
-                    response = requests.delete(f"{BASE_URL}/articulos/{sku}")
+                    response = api_client.delete(f"/articulos/{sku}")
                     if response.status_code == 200:
                         st.success("Artículo eliminado exitosamente")
                     else:
@@ -188,16 +229,18 @@ def cambio_articulo():
     sku = st.text_input("SKU", max_chars=6, key="cambio_sku")
     
     if sku:
-        response = requests.get(f"{BASE_URL}/articulos/{sku}")
-        if response.status_code == 200:
-            articulo = response.json()
+        encontrado, articulo = get_articulo(sku)
+        if not encontrado:
+            return
+        if articulo is not None:
             articulo_update = {}
             
             articulo_update["articulo"] = st.text_input("Artículo", value=articulo["articulo"], max_chars=15, key="cambio_articulo")
             articulo_update["marca"] = st.text_input("Marca", value=articulo["marca"], max_chars=15, key="cambio_marca")
             articulo_update["modelo"] = st.text_input("Modelo", value=articulo["modelo"], max_chars=20, key="cambio_modelo")
             
-            departamentos = get_departamentos()
+            catalogo = get_catalogo()
+            departamentos = catalogo
             articulo_update["departamento_numero"] = st.selectbox(
                 "Departamento", 
                 options=[d['numero'] for d in departamentos], 
@@ -206,7 +249,7 @@ def cambio_articulo():
                 key="cambio_departamento"
             )
             
-            clases = get_clases(articulo_update["departamento_numero"])
+            clases = get_clases(catalogo, articulo_update["departamento_numero"])
             clase_actual = articulo["clase_numero"]
             articulo_update["clase_numero"] = st.selectbox(
                 "Clase", 
@@ -216,7 +259,7 @@ def cambio_articulo():
                 key="cambio_clase"
             )
             
-            familias = get_familias(articulo_update["departamento_numero"], articulo_update["clase_numero"])
+            familias = get_familias(catalogo, articulo_update["departamento_numero"], articulo_update["clase_numero"])
             articulo_update["familia_numero"] = st.selectbox(
                 "Familia", 
                 options=[f['numero'] for f in familias], 
@@ -247,7 +290,7 @@ def cambio_articulo():
                     "descontinuado": articulo_update["descontinuado"]
                 }
                 st.write("Datos a enviar:", data)  # Print data for verification
-                response = requests.put(f"{BASE_URL}/articulos/{sku}", json=data)
+                response = api_client.put(f"/articulos/{sku}", json=data)
                 if response.status_code == 200:
                     st.success("Artículo actualizado exitosamente")
                 else:
@@ -267,9 +310,10 @@ def consulta_articulo():
     sku = st.text_input("SKU", max_chars=6, key="consulta_sku")
     
     if sku:
-        response = requests.get(f"{BASE_URL}/articulos/{sku}")
-        if response.status_code == 200:
-            articulo = response.json()
+        encontrado, articulo = get_articulo(sku)
+        if not encontrado:
+            return
+        if articulo is not None:
             st.write("Artículo:", articulo["articulo"])
             st.write("Marca:", articulo["marca"])
             st.write("Modelo:", articulo["modelo"])
@@ -287,47 +331,80 @@ def generar_csv():
     """
     Generates CSV files for all tables in the database.
 
-    This function reads all tables from the SQLite database and saves them as CSV files.
+    This function downloads every table from the export API and saves it as a CSV, Parquet or
+    Arrow IPC file. The files are streamed to disk in chunks, so memory use does not depend on
+    the table size.
+    In incremental mode only the changes since the previous incremental export are written,
+    and tables without changes are skipped. Tables whose content did not change since a
+    previous snapshot are not stored again (see `snapshots`), and old snapshots are pruned.
     """
     st.subheader("Generar CSV")
-    
-    # Ensure the csv/ folder exists
-    if not os.path.exists('csv'):
-        os.makedirs('csv')
-    
-    # Connect to the database
-    conn = sqlite3.connect('sql_app.db')
-    
-    # Get the list of all tables in the database
-    cursor = conn.cursor()
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-    tables = cursor.fetchall()
-    
+    formato = st.selectbox("Formato", ["csv", "parquet", "arrow"], key="csv_formato")
+    incremental = st.checkbox("Solo cambios desde la última exportación", key="csv_incremental")
+    # Parquet and Arrow files are already compressed/binary, gzip only applies to CSV
+    comprimir = formato == "csv" and st.checkbox("Comprimir (gzip)", key="csv_gzip")
+
+    if not st.button("Generar", key="csv_generar"):
+        return
+
+    try:
+        response = api_client.get("/export/")
+    except requests.RequestException:
+        response = None
+    if response is None or response.status_code != 200:
+        st.error("Error al obtener la lista de tablas")
+        return
+
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
     generated_files = []
-    
-    for table in tables:
-        table_name = table[0]
-        
-        # Read the table into a DataFrame
-        df = pd.read_sql_query(f"SELECT * FROM {table_name}", conn)
-        
-        # Generate the file name
-        filename = f"csv/{table_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-        
-        # Save the DataFrame as CSV
-        df.to_csv(filename, index=False)
-        
-        generated_files.append(filename)
-    
-    # Close the connection
-    conn.close()
-    
+    unchanged_tables = []
+    reused_files = []
+    manifest_tables = {}
+    hashes = snapshots.indice_hashes(snapshots.cargar_manifiestos())
+
+    for table_name in response.json():
+        prefix = f"{table_name}_delta" if incremental else table_name
+        filename = f"{prefix}_{timestamp}.{formato}" + (".gz" if comprimir else "")
+        params = {"incremental": incremental}
+        if formato == "csv":
+            params["gzip"] = comprimir
+        try:
+            # An incremental export advances the server watermark, so it must not be retried
+            with api_client.get(
+                f"/export/{table_name}.{formato}", params=params, stream=True, reintentar=not incremental
+            ) as response:
+                if response.status_code == 204:
+                    unchanged_tables.append(table_name)
+                    continue
+                if response.status_code != 200:
+                    st.error(f"Error al exportar la tabla {table_name}")
+                    continue
+                entry = snapshots.guardar_tabla(
+                    table_name, filename, response.iter_content(chunk_size=64 * 1024), hashes
+                )
+        except requests.RequestException:
+            st.error(f"Error al exportar la tabla {table_name}")
+            continue
+        manifest_tables[table_name] = entry
+        path = os.path.join(snapshots.DIRECTORIO, entry["archivo"])
+        (reused_files if entry["reutilizado"] else generated_files).append(path)
+
+    if manifest_tables:
+        snapshots.escribir_manifiesto(timestamp, manifest_tables, formato=formato, incremental=incremental)
+        snapshots.aplicar_retencion()
+
     if generated_files:
-        st.success("Archivos CSV generados exitosamente:")
+        st.success("Archivos generados exitosamente:")
         for file in generated_files:
             st.write(file)
-    else:
-        st.error("No se pudo generar ningún archivo CSV")
+    if reused_files:
+        st.info("Sin cambios respecto a la exportación anterior (no se duplicaron):")
+        for file in reused_files:
+            st.write(file)
+    if not generated_files and not reused_files and not unchanged_tables:
+        st.error("No se pudo generar ningún archivo")
+    if unchanged_tables:
+        st.info(f"Tablas sin cambios: {', '.join(unchanged_tables)}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,177 @@
+"""
+This module stores the export snapshots written by the frontend in the csv/ folder.
+
+Each export run writes a manifest, `manifiesto_<timestamp>.json`, that records
+the file, size and SHA-256 content hash of every table. A table whose content
+matches a file of a previous snapshot is not stored again: it is hardlinked to
+that file or, if hardlinks are disabled or unsupported, the manifest simply
+points to it. Snapshots beyond the retention limit are pruned together with
+the files no remaining manifest refers to.
+
+Configuration is read from the environment:
+    ABCC_SNAPSHOT_DIR: Folder of the snapshots (default csv).
+    ABCC_SNAPSHOT_DEDUP: 'enlace' to hardlink unchanged tables, 'omitir' to reuse the previous file.
+    ABCC_SNAPSHOT_RETENCION: Number of snapshots to keep, 0 to keep all (default 10).
+"""
+
+import hashlib
+import json
+import os
+
+DIRECTORIO = os.environ.get("ABCC_SNAPSHOT_DIR", "csv")
+DEDUP = os.environ.get("ABCC_SNAPSHOT_DEDUP", "enlace")
+RETENCION = int(os.environ.get("ABCC_SNAPSHOT_RETENCION", "10"))
+
+PREFIJO_MANIFIESTO = "manifiesto_"
+
+def _ruta(nombre, directorio=None):
+    return os.path.join(directorio or DIRECTORIO, nombre)
+
+def cargar_manifiestos(directorio=None):
+    """
+    Reads the manifests of the stored snapshots.
+
+    Args:
+        directorio (str): The snapshot folder (default DIRECTORIO).
+
+    Returns:
+        List[tuple]: The `(file name, manifest)` pairs, oldest first.
+    """
+    directorio = directorio or DIRECTORIO
+    if not os.path.isdir(directorio):
+        return []
+    manifiestos = []
+    for nombre in sorted(os.listdir(directorio)):
+        if nombre.startswith(PREFIJO_MANIFIESTO) and nombre.endswith(".json"):
+            with open(_ruta(nombre, directorio), encoding="utf-8") as f:
+                manifiestos.append((nombre, json.load(f)))
+    return manifiestos
+
+def indice_hashes(manifiestos, directorio=None):
+    """
+    Indexes the stored files by table and content hash.
+
+    Args:
+        manifiestos (list): The manifests returned by `cargar_manifiestos`.
+        directorio (str): The snapshot folder (default DIRECTORIO).
+
+    Returns:
+        dict: `(table, sha256)` -> file name of an existing file with that content.
+    """
+    indice = {}
+    for _, manifiesto in manifiestos:
+        for tabla, entrada in manifiesto["tablas"].items():
+            if os.path.exists(_ruta(entrada["archivo"], directorio)):
+                indice[(tabla, entrada["sha256"])] = entrada["archivo"]
+    return indice
+
+def guardar_tabla(tabla, nombre, bloques, hashes, directorio=None):
+    """
+    Writes an exported table, unless a previous snapshot already holds the same content.
+
+    The chunks are written to a temporary file while they are hashed; if the
+    hash matches a stored file of the same table the temporary file is
+    discarded and the new name is hardlinked to the stored file (or, with
+    ABCC_SNAPSHOT_DEDUP=omitir, the stored file is reused as is).
+
+    Args:
+        tabla (str): The name of the table.
+        nombre (str): The file name for this snapshot.
+        bloques (Iterable[bytes]): The content of the file.
+        hashes (dict): The index returned by `indice_hashes`; updated with the new file.
+        directorio (str): The snapshot folder (default DIRECTORIO).
+
+    Returns:
+        dict: The manifest entry: `archivo`, `sha256`, `bytes` and `reutilizado`.
+    """
+    directorio = directorio or DIRECTORIO
+    os.makedirs(directorio, exist_ok=True)
+    temporal = _ruta(nombre + ".part", directorio)
+    sha256 = hashlib.sha256()
+    tamano = 0
+    try:
+        with open(temporal, "wb") as f:
+            for bloque in bloques:
+                sha256.update(bloque)
+                tamano += len(bloque)
+                f.write(bloque)
+        digest = sha256.hexdigest()
+
+        previo = hashes.get((tabla, digest))
+        if previo is not None:
+            if DEDUP == "enlace":
+                try:
+                    os.link(_ruta(previo, directorio), _ruta(nombre, directorio))
+                    previo = nombre
+                except OSError:
+                    pass  # Filesystem without hardlinks: the manifest points to the previous file
+            return {"archivo": previo, "sha256": digest, "bytes": tamano, "reutilizado": True}
+
+        os.replace(temporal, _ruta(nombre, directorio))
+        hashes[(tabla, digest)] = nombre
+        return {"archivo": nombre, "sha256": digest, "bytes": tamano, "reutilizado": False}
+    finally:
+        # Left behind by a duplicate or by a download that failed halfway
+        if os.path.exists(temporal):
+            os.remove(temporal)
+
+def escribir_manifiesto(timestamp, tablas, directorio=None, **datos):
+    """
+    Writes the manifest of a snapshot.
+
+    The file is created exclusively, so a manifest is never overwritten: if
+    another export already used the same timestamp, a numeric suffix is added.
+
+    Args:
+        timestamp (str): The timestamp of the snapshot, used in the file name.
+        tablas (dict): The entries returned by `guardar_tabla`, by table.
+        directorio (str): The snapshot folder (default DIRECTORIO).
+        **datos: Extra fields to record (e.g. the format).
+
+    Returns:
+        str: The file name of the manifest.
+    """
+    intento = 0
+    while True:
+        sufijo = f"_{intento}" if intento else ""
+        nombre = f"{PREFIJO_MANIFIESTO}{timestamp}{sufijo}.json"
+        try:
+            f = open(_ruta(nombre, directorio), "x", encoding="utf-8")
+        except FileExistsError:
+            intento += 1
+            continue
+        with f:
+            json.dump({"fecha": timestamp, **datos, "tablas": tablas}, f, indent=2)
+        return nombre
+
+def aplicar_retencion(conservar=None, directorio=None):
+    """
+    Prunes the oldest snapshots beyond the retention limit.
+
+    The manifests of the pruned snapshots are deleted along with every file
+    they list that no remaining manifest refers to. Files without a manifest
+    (written before manifests existed) are left untouched.
+
+    Args:
+        conservar (int): The number of snapshots to keep (default RETENCION, 0 keeps all).
+        directorio (str): The snapshot folder (default DIRECTORIO).
+
+    Returns:
+        List[str]: The names of the deleted files.
+    """
+    conservar = RETENCION if conservar is None else conservar
+    manifiestos = cargar_manifiestos(directorio)
+    if conservar <= 0 or len(manifiestos) <= conservar:
+        return []
+    vencidos, vigentes = manifiestos[:-conservar], manifiestos[-conservar:]
+    en_uso = {entrada["archivo"] for _, m in vigentes for entrada in m["tablas"].values()}
+    eliminados = []
+    for nombre, manifiesto in vencidos:
+        for entrada in manifiesto["tablas"].values():
+            archivo = entrada["archivo"]
+            if archivo not in en_uso and archivo not in eliminados and os.path.exists(_ruta(archivo, directorio)):
+                os.remove(_ruta(archivo, directorio))
+                eliminados.append(archivo)
+        os.remove(_ruta(nombre, directorio))
+        eliminados.append(nombre)
+    return eliminados
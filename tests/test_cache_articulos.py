@@ -0,0 +1,91 @@
+"""
+Tests of the article cache and of the change-log poller that keeps it coherent across workers.
+
+Every test runs on a new, migrated SQLite file with fresh in-memory caches.
+Writes made by another worker are simulated with a plain sqlite3 connection,
+which the change-log triggers record like any other write.
+"""
+
+import sqlite3
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from backend import cache_articulos, coherencia, crud, database, indice_sku, migraciones, models
+
+@pytest.fixture
+def entorno(tmp_path, monkeypatch):
+    ruta = tmp_path / "prueba.db"
+    motor = database.crear_motor(f"sqlite:///{ruta}")
+    migraciones.migrar(motor)
+    monkeypatch.setattr(coherencia, "engine", motor)
+    monkeypatch.setattr(cache_articulos, "cache", cache_articulos.CacheArticulos(tamano_maximo=100, ttl=60))
+    monkeypatch.setattr(indice_sku, "indice", indice_sku.IndiceSku())
+    db = sessionmaker(bind=motor)()
+    otro_worker = sqlite3.connect(ruta, isolation_level=None)
+    yield db, otro_worker
+    otro_worker.close()
+    db.close()
+    motor.dispose()
+
+def _articulo(sku, marca="MARCA"):
+    return models.ArticuloCreate(
+        sku=sku, articulo="ARTICULO", marca=marca, modelo="MODELO",
+        departamento_numero="1", clase_numero="01", familia_numero="001", stock=10, cantidad=5,
+    )
+
+def _sincronizador():
+    sincronizador = coherencia.Sincronizador()
+    sincronizador.sincronizar()  # Records the current position of the change log
+    return sincronizador
+
+def test_escritura_propia_se_cachea_y_un_cambio_remoto_la_invalida(entorno):
+    db, otro_worker = entorno
+    sincronizador = _sincronizador()
+
+    crud.crear_articulo(db, _articulo("A1"))
+    assert cache_articulos.cache.consultar("A1")["marca"] == "MARCA"
+
+    # The poller sees this process's own write, whose row is already cached
+    sincronizador.sincronizar()
+    assert cache_articulos.cache.consultar("A1")["marca"] == "MARCA"
+
+    otro_worker.execute("UPDATE articulos SET marca = 'OTRA' WHERE sku = 'A1'")
+    sincronizador.sincronizar()
+    assert cache_articulos.cache.consultar("A1") is cache_articulos.AUSENTE
+    db.rollback()  # Like a new request, read a fresh snapshot
+    assert crud.obtener_articulo(db, "A1")["marca"] == "OTRA"
+
+def test_hueco_en_la_bitacora_invalida_todo(entorno):
+    db, otro_worker = entorno
+    crud.crear_articulo(db, _articulo("B1"))
+    indice_sku.indice.cargar(db)
+    sincronizador = _sincronizador()
+    assert cache_articulos.cache.consultar("B1") is not cache_articulos.AUSENTE
+
+    # Changes pruned before the poller could read them, e.g. by an incremental export
+    otro_worker.execute("INSERT INTO articulos (sku, articulo, stock, cantidad) VALUES ('B2', 'NUEVO', 1, 1)")
+    otro_worker.execute("DELETE FROM cambios")
+    sincronizador.sincronizar()
+
+    assert cache_articulos.cache.consultar("B1") is cache_articulos.AUSENTE
+    assert indice_sku.indice._skus is None
+    db.rollback()  # Like a new request, read a fresh snapshot
+    assert indice_sku.indice.existe(db, "B2")
+
+def test_entrada_negativa_se_descarta_al_crear_el_articulo(entorno):
+    db, otro_worker = entorno
+    sincronizador = _sincronizador()
+
+    assert crud.obtener_articulo(db, "C1") is None
+    assert cache_articulos.cache.consultar("C1") is None
+    crud.crear_articulo(db, _articulo("C1"))
+    assert cache_articulos.cache.consultar("C1")["sku"] == "C1"
+
+    # Created by another worker
+    assert crud.obtener_articulo(db, "C2") is None
+    otro_worker.execute("INSERT INTO articulos (sku, articulo, stock, cantidad) VALUES ('C2', 'NUEVO', 1, 1)")
+    sincronizador.sincronizar()
+    assert cache_articulos.cache.consultar("C2") is cache_articulos.AUSENTE
+    db.rollback()  # Like a new request, read a fresh snapshot
+    assert crud.obtener_articulo(db, "C2")["articulo"] == "NUEVO"